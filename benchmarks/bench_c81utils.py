@@ -0,0 +1,144 @@
+""" Benchmarks for loading, writing and interpolating C81 airfoil tables """
+""" Run from the repository root: python3 benchmarks/bench_c81utils.py """
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import timeit
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import c81utils
+
+
+def syntheticAirfoil(nalpha, nmach, name='SYNTHETIC'):
+    """ Returns a C81 object with smooth made-up coefficients """
+    alpha = np.linspace(-180.0, 180.0, nalpha)
+    mach = np.linspace(0.0, 0.95, nmach)
+    alphaRad = np.radians(alpha)[:, np.newaxis]
+    beta = np.sqrt(1.0 - 0.9*mach[np.newaxis, :]**2)
+    CL = np.round(np.sin(2*alphaRad) / beta, 3)
+    CD = np.round(0.01 + 1.8*np.sin(alphaRad)**2 / beta, 3)
+    CM = np.round(-0.1*np.sin(alphaRad) / beta, 3)
+    return c81utils.C81(name, alpha, mach, CL, alpha, mach, CD, alpha, mach, CM)
+
+
+def timePerCall(func, number, repeat):
+    """ Returns best time per call in seconds """
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def runBenchmarks(repeat=5, quick=False):
+    """ Returns dict of benchmark names and times per operation in seconds """
+    scale = 10 if quick else 1
+    results = {}
+    tables = {'small': syntheticAirfoil(20, 5),
+              # More than 9 mach values wraps every row onto two lines
+              'large': syntheticAirfoil(99, 19)}
+
+    for size, airfoil in tables.items():
+        text = c81utils.dumps(airfoil)
+        results['load_' + size] = timePerCall(
+            lambda: c81utils.load(io.StringIO(text)), 200 // scale, repeat)
+        results['dump_' + size] = timePerCall(
+            lambda: c81utils.dump(airfoil, io.StringIO()), 200 // scale, repeat)
+        results['refresh_' + size] = timePerCall(
+            airfoil.refreshInterpolation, 200 // scale, repeat)
+
+    airfoil = tables['large']
+    airfoil.refreshInterpolation()
+    results['lookup_scalar_CL'] = timePerCall(
+        lambda: airfoil.getCL(5.3, 0.41), 100000 // scale, repeat)
+    results['lookup_scalar_coeffs'] = timePerCall(
+        lambda: airfoil.getCoeffs(5.3, 0.41), 100000 // scale, repeat)
+
+    rng = np.random.default_rng(0)
+    alphas = rng.uniform(-180.0, 180.0, 100000)
+    machs = rng.uniform(0.0, 0.95, 100000)
+    results['lookup_batch_CL_100k'] = timePerCall(
+        lambda: airfoil.getCLArray(alphas, machs), 50 // scale, repeat)
+    results['lookup_batch_coeffs_100k'] = timePerCall(
+        lambda: airfoil.getCoeffsArray(alphas, machs), 50 // scale, repeat)
+
+    # Repeated points, as in trim iterations, answered from the cache
+    cachedAirfoil = syntheticAirfoil(99, 19)
+    cachedAirfoil.enableCache()
+    results['lookup_cached_scalar_CL'] = timePerCall(
+        lambda: cachedAirfoil.getCL(5.3, 0.41), 100000 // scale, repeat)
+    results['lookup_cached_scalar_coeffs'] = timePerCall(
+        lambda: cachedAirfoil.getCoeffs(5.3, 0.41), 100000 // scale, repeat)
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        filenames = []
+        for i in range(50):
+            filename = os.path.join(tmpdir, 'airfoil' + str(i) + '.C81')
+            with open(filename, 'w') as fh:
+                c81utils.dump(tables['large' if i % 2 else 'small'], fh)
+            filenames.append(filename)
+
+        def loadLibrary():
+            for filename in filenames:
+                with open(filename, 'r') as fh:
+                    c81utils.load(fh)
+        results['load_library_50'] = timePerCall(loadLibrary, 10 // scale or 1, repeat)
+    finally:
+        shutil.rmtree(tmpdir)
+
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """ Prints results against baseline and returns names of regressions """
+    regressions = []
+    print('{:28} {:>12} {:>12} {:>8}'.format('benchmark', 'baseline', 'current', 'ratio'))
+    for name, seconds in results.items():
+        if name not in baseline:
+            print('{:28} {:>12} {:12.3e} {:>8}'.format(name, '-', seconds, '-'))
+            continue
+        ratio = seconds / baseline[name]
+        flag = ''
+        if ratio > 1.0 + tolerance:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print('{:28} {:12.3e} {:12.3e} {:8.2f}{}'.format(name, baseline[name], seconds, ratio, flag))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks for c81utils')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed fractional slowdown before flagging a regression')
+    parser.add_argument('--repeat', type=int, default=5, help='no. of timing repeats')
+    parser.add_argument('--quick', action='store_true', help='run fewer iterations')
+    args = parser.parse_args()
+
+    report = {'c81utils': c81utils.__version__,
+              'python': platform.python_version(),
+              'numpy': np.__version__,
+              'machine': platform.machine(),
+              'results': runBenchmarks(args.repeat, args.quick)}
+
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r') as fh:
+            baseline = json.load(fh)['results']
+        regressions = compare(report['results'], baseline, args.tolerance)
+        if regressions:
+            print('Regressions: ' + ', '.join(regressions))
+            sys.exit(1)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
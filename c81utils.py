@@ -1,17 +1,62 @@
+from bisect import bisect_right
+from collections import OrderedDict
+from itertools import count, islice
+from operator import attrgetter
+from concurrent.futures import ProcessPoolExecutor
+import glob
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+import weakref
 import numpy as np
 from scipy.interpolate import RectBivariateSpline
 
+try:
+    import numba
+except ImportError:
+    numba = None
+
 
 __version__ = '1.0.7'
 
+# Default upper limit on buckets per grid in a GridIndex
+MAX_BUCKETS = 4096
+
+# Max. no. of query points times alpha values solved at once by solveAlpha
+SOLVE_BLOCK_SIZE = 2**16
+
+# Evaluation backends for batched lookups, see setBackend
+BACKENDS = ('numpy', 'numba')
+_backend = 'numpy' if numba is None else 'numba'
+
+# Plausible ranges of values checked by validate
+VALUE_LIMITS = {'alpha': (-180.0, 180.0), 'mach': (0.0, 3.0),
+                'CL': (-3.0, 3.0), 'CD': (0.0, 3.0), 'CM': (-1.0, 1.0)}
+
+# Binary format identifier and suffix of cached sidecar files
+_BINARY_MAGIC = b'C81BIN\x00\x01'
+SIDECAR_SUFFIX = '.c81b'
+
+
 class CoeffTable:
-    """ CoeffTable class for aerodynamic coefficients """
+    """
+    CoeffTable class for aerodynamic coefficients
+    Interpolation data is built on first use and rebuilt on the next query after
+    alpha, mach or val is assigned. Call markDirty after editing arrays in place.
+    """
 
-    alpha = np.array([])
-    mach = np.array([])
-    val = np.array([])
+    __slots__ = ('coeffname', '_alpha', '_mach', '_val', '_dirty', '_version',
+                 '_spline', '_indexBuckets', '_alphaIndex', '_machIndex',
+                 '_alphaList', '_machList', '_alphaWidth', '_machWidth', '_cells',
+                 '_fingerprint', '__weakref__')
 
-    def __init__(self, alpha, mach, val):
+    def __init__(self, alpha, mach, val, coeffname='coefficient'):
+        self.coeffname = coeffname
+        self._indexBuckets = None
+        self._fingerprint = None
         self.alpha = alpha
         self.mach = mach
         self.val = val
@@ -37,9 +82,696 @@ class CoeffTable:
         elif self.val.shape[1] != cols:
             raise ValueError('Inconsistent no. of mach and ' + coeffname + ' coefficient values')
 
+    @property
+    def alpha(self):
+        return self._alpha
+
+    @alpha.setter
+    def alpha(self, alpha):
+        self._alpha = alpha
+        self.markDirty()
+
+    @property
+    def mach(self):
+        return self._mach
+
+    @mach.setter
+    def mach(self, mach):
+        self._mach = mach
+        self.markDirty()
+
+    @property
+    def val(self):
+        return self._val
+
+    @val.setter
+    def val(self, val):
+        self._val = val
+        self.markDirty()
+
+    def markDirty(self):
+        """ Marks interpolation data as stale so that it is rebuilt on next use """
+        self._dirty = True
+        self._version = next(_versionCounter)
+        self._spline = None
+
+    @property
+    def isBuilt(self):
+        """ Checks if interpolation data is built and up to date """
+        return not self._dirty
+
+    @property
+    def interpolator(self):
+        """ Returns RectBivariateSpline interpolating the table, built on first use """
+        if self._dirty:
+            self._build()
+        if self._spline is None:
+            self._spline = RectBivariateSpline(self.alpha, self.mach, self.val, kx=1, ky=1)
+        return self._spline
+
+    def _build(self):
+        """ Checks grids and builds data for scalar queries and lookup indices """
+        # Ensure alpha and mach are strictly increasing
+        if not _isIncreasing(self.alpha):
+            raise ValueError('alpha ' + self.coeffname + ' should be strictly increasing')
+        if not _isIncreasing(self.mach):
+            raise ValueError('mach ' + self.coeffname + ' should be strictly increasing')
+
+        self._buildCells()
+        if self._indexBuckets is None:
+            self._alphaIndex = None
+            self._machIndex = None
+        else:
+            self._alphaIndex = GridIndex.build(self.alpha, self._indexBuckets)
+            self._machIndex = GridIndex.build(self.mach, self._indexBuckets)
+        self._dirty = False
+
+    def nbytes(self):
+        """ Returns memory used by alpha, mach and val arrays in bytes """
+        return _nbytes([self.alpha, self.mach, self.val])
+
+    def compact(self, dtype=np.float32):
+        """
+        Stores val with the given dtype and shares alpha and mach arrays with
+        identical grids of other compacted tables
+        Shared grids are read-only.
+        """
+        self.alpha = _internGrid(self.alpha)
+        self.mach = _internGrid(self.mach)
+        self.val = np.ascontiguousarray(self.val, dtype=dtype)
+
+    def fingerprint(self):
+        """
+        Returns hex digest of the contents of alpha, mach and val
+        Tables with equal shapes and float64 values have equal fingerprints.
+        -0.0 is hashed as 0.0 and all NaNs alike, so tables with NaN at the
+        same places also have equal fingerprints though they compare unequal.
+        The digest is computed once for each version of the table.
+        """
+        if self._fingerprint is None or self._fingerprint[0] != self._version:
+            digest = hashlib.blake2b(digest_size=16)
+            for arr in (self.alpha, self.mach, self.val):
+                arr = np.asarray(arr, dtype=np.float64)
+                # Adding 0.0 turns -0.0 into 0.0
+                arr = np.ascontiguousarray(np.where(np.isnan(arr), np.nan, arr + 0.0),
+                                           dtype='<f8')
+                digest.update(np.array(arr.shape, dtype='<i8').tobytes())
+                digest.update(arr.tobytes())
+            self._fingerprint = (self._version, digest.hexdigest())
+        return self._fingerprint[1]
+
+    def sameGrid(self, other):
+        """ Checks if alpha and mach arrays are identical to those of other table """
+        return (np.array_equal(self.alpha, other.alpha) and
+                np.array_equal(self.mach, other.mach))
+
+    def interpolate(self, alphaQuery, machQuery):
+        """
+        Returns bilinearly interpolated values for arrays of query points
+        Queries are broadcast against each other and clamped to the table edges
+        """
+        return self._blend(self._locate(*_broadcastQuery(alphaQuery, machQuery)))
+
+    def interpolateGradient(self, alphaQuery, machQuery):
+        """
+        Returns bilinearly interpolated values and their partial derivatives
+        with respect to alpha and mach for arrays of query points
+        Derivatives are exact for the piecewise bilinear surface and taken from
+        the cell above at grid lines. They are zero along a clamped direction
+        outside the table.
+        """
+        alphaQuery, machQuery = _broadcastQuery(alphaQuery, machQuery)
+        return self._blendGradient(self._locate(alphaQuery, machQuery), alphaQuery, machQuery)
+
+    def solveAlpha(self, valQuery, machQuery, alphaRange=None, preStall=None,
+                   allSolutions=False):
+        """
+        Returns alpha at which the interpolated value equals valQuery
+        The table is interpolated along mach first and the alpha segments
+        bracketing valQuery are then solved for all query points at once.
+        Solutions are limited to alphaRange, a (min, max) tuple, if given and to
+        the pre-stall branch if preStall is True, which is the default when no
+        alphaRange is given. The pre-stall branch is the run of segments with
+        increasing values around alpha = 0.
+        Returns the lowest solution for each query point, or NaN if there is
+        none. With allSolutions, returns arrays of query point indices into the
+        flattened broadcast queries and their solutions instead.
+        Temporary arrays take about 80 bytes per alpha value and query point,
+        so points are solved in blocks of SOLVE_BLOCK_SIZE such elements.
+        """
+        if preStall is None:
+            preStall = alphaRange is None
+        valQuery, machQuery = _broadcastQuery(valQuery, machQuery)
+        shape = valQuery.shape
+        valQuery = valQuery.reshape(-1)
+        machQuery = machQuery.reshape(-1)
+        if self._dirty:
+            self._build()
+
+        # Points are solved in blocks to bound the size of per-segment arrays
+        npoints = max(SOLVE_BLOCK_SIZE // self.alpha.size, 1)
+        blocks = [self._solveAlphaBlock(valQuery[start:start+npoints],
+                                        machQuery[start:start+npoints],
+                                        alphaRange, preStall, allSolutions)
+                  for start in range(0, valQuery.size, npoints)]
+        if allSolutions:
+            if not blocks:
+                return np.empty(0, dtype=np.intp), np.empty(0)
+            return (np.concatenate([pointIndex + start for start, (pointIndex, alpha)
+                                    in zip(range(0, valQuery.size, npoints), blocks)]),
+                    np.concatenate([alpha for pointIndex, alpha in blocks]))
+        if not blocks:
+            return np.empty(shape)
+        return np.concatenate(blocks).reshape(shape)
+
+    def _solveAlphaBlock(self, valQuery, machQuery, alphaRange, preStall, allSolutions):
+        """ Returns solutions of solveAlpha for flat arrays of query points """
+        valQuery = valQuery[:, np.newaxis]
+        if self._machIndex is None:
+            j, tm = _findInterval(self.mach, machQuery)
+        else:
+            j, tm = self._machIndex.findInterval(machQuery)
+
+        # Values along alpha at each query mach
+        curve = (1.0 - tm)[:, np.newaxis] * self.val[:, j].T + tm[:, np.newaxis] * self.val[:, j+1].T
+        c0 = curve[:, :-1]
+        c1 = curve[:, 1:]
+        allowed = ((np.minimum(c0, c1) <= valQuery) & (valQuery <= np.maximum(c0, c1)))
+
+        if alphaRange is not None:
+            allowed &= (self.alpha[1:] >= alphaRange[0]) & (self.alpha[:-1] <= alphaRange[1])
+        if preStall:
+            increasing = c1 > c0
+            k0 = min(max(int(np.searchsorted(self.alpha, 0.0, side='right')) - 1, 0),
+                     self.alpha.size - 2)
+            branch = np.zeros_like(increasing)
+            branch[:, k0:] = np.cumprod(increasing[:, k0:], axis=1)
+            if k0 > 0:
+                branch[:, :k0] = (np.cumprod(increasing[:, k0-1::-1], axis=1)[:, ::-1] &
+                                  increasing[:, k0:k0+1])
+            allowed &= branch
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            frac = np.where(c1 != c0, (valQuery - c0) / (c1 - c0), 0.0)
+        alpha = self.alpha[:-1] + frac * np.diff(self.alpha)
+        # A solution on a grid point is found by both segments sharing it
+        allowed[:, :-1] &= ~((frac[:, :-1] == 1.0) & allowed[:, 1:])
+        if alphaRange is not None:
+            allowed &= (alpha >= alphaRange[0]) & (alpha <= alphaRange[1])
+
+        if allSolutions:
+            pointIndex, segment = np.nonzero(allowed)
+            return pointIndex, alpha[pointIndex, segment]
+        alpha = np.where(allowed, alpha, np.inf).min(axis=1)
+        return np.where(np.isinf(alpha), np.nan, alpha)
+
+    def interpolateScalar(self, alphaQuery, machQuery):
+        """
+        Returns bilinearly interpolated value for a single query point
+        Uses the per-cell data from _buildCells and plain float arithmetic.
+        Targets a latency of about 1 microsecond per call.
+        """
+        return self._blendScalar(self._locateScalar(alphaQuery, machQuery))
+
+    def _buildCells(self):
+        """ Precomputes grid widths and per-cell corner values for scalar queries """
+        self._alphaList = self.alpha.tolist()
+        self._machList = self.mach.tolist()
+        self._alphaWidth = np.diff(self.alpha).tolist()
+        self._machWidth = np.diff(self.mach).tolist()
+        val = np.asarray(self.val, dtype=float)
+        self._cells = np.stack((val[:-1, :-1], val[:-1, 1:],
+                                val[1:, :-1], val[1:, 1:]), axis=-1).tolist()
+
+    def buildIndex(self, maxBuckets=MAX_BUCKETS):
+        """
+        Builds constant-time lookup indices for the alpha and mach grids
+        Indices speed up batched lookups, single values are still bisected.
+        Grids needing more than maxBuckets buckets keep using bisection.
+        Indices are rebuilt along with other interpolation data until dropIndex.
+        Returns the memory used by the indices in bytes
+        """
+        self._indexBuckets = maxBuckets
+        self._build()
+        return self.indexNbytes()
+
+    def dropIndex(self):
+        """ Removes lookup indices and reverts to bisection """
+        self._indexBuckets = None
+        self._alphaIndex = None
+        self._machIndex = None
+
+    def indexNbytes(self):
+        """ Returns the memory used by lookup indices in bytes """
+        if self._dirty:
+            return 0
+        return sum(index.nbytes for index in (self._alphaIndex, self._machIndex)
+                   if index is not None)
+
+    def _locateScalar(self, alphaQuery, machQuery):
+        """
+        Returns bracketing cell indices and fractions for a single query point
+        Lookup indices are not used, bisect is faster for single values.
+        """
+        if self._dirty:
+            self._build()
+        i, ta = _findIntervalScalar(self._alphaList, self._alphaWidth, alphaQuery)
+        j, tm = _findIntervalScalar(self._machList, self._machWidth, machQuery)
+        return i, ta, j, tm
+
+    def _blendScalar(self, cell):
+        """ Returns value bilinearly blended over a cell from _locateScalar """
+        if self._dirty:
+            self._build()
+        i, ta, j, tm = cell
+        v00, v01, v10, v11 = self._cells[i][j]
+        return ((1.0 - ta) * ((1.0 - tm) * v00 + tm * v01) +
+                ta * ((1.0 - tm) * v10 + tm * v11))
+
+    def _locate(self, alphaQuery, machQuery):
+        """ Returns bracketing cell indices and fractions for query points """
+        if self._dirty:
+            self._build()
+        if self._alphaIndex is None:
+            i, ta = _findInterval(self.alpha, alphaQuery)
+        else:
+            i, ta = self._alphaIndex.findInterval(alphaQuery)
+        if self._machIndex is None:
+            j, tm = _findInterval(self.mach, machQuery)
+        else:
+            j, tm = self._machIndex.findInterval(machQuery)
+        return i, ta, j, tm
+
+    def _locateNear(self, alphaQuery, machQuery, alphaHint, machHint):
+        """
+        Returns cells as in _locate starting from hinted intervals, which are
+        updated in place, and no. of alpha and mach queries that were searched
+        """
+        if self._dirty:
+            self._build()
+        i, ta, alphaSearched = _findIntervalNear(
+            self.alpha, alphaQuery, alphaHint,
+            None if self._alphaIndex is None else self._alphaIndex.findInterval)
+        j, tm, machSearched = _findIntervalNear(
+            self.mach, machQuery, machHint,
+            None if self._machIndex is None else self._machIndex.findInterval)
+        return (i, ta, j, tm), alphaSearched + machSearched
+
+    def _bucketGrids(self):
+        """ Returns alpha and mach grids as tuples of grid and GridIndex start and scale """
+        return tuple((grid, _NO_BUCKETS, 0.0) if index is None else
+                     (grid, index.start, index.scale)
+                     for grid, index in ((self.alpha, self._alphaIndex),
+                                         (self.mach, self._machIndex)))
+
+    def _blend(self, cell):
+        """ Returns values bilinearly blended over cells from _locate """
+        i, ta, j, tm = cell
+        return ((1.0 - ta) * ((1.0 - tm) * self.val[i, j] + tm * self.val[i, j+1]) +
+                ta * ((1.0 - tm) * self.val[i+1, j] + tm * self.val[i+1, j+1]))
+
+    def _blendGradient(self, cell, alphaQuery, machQuery):
+        """ Returns values and alpha and mach derivatives over cells from _locate """
+        i, ta, j, tm = cell
+        val = self.val
+        v00 = val[i, j]
+        v01 = val[i, j+1]
+        v10 = val[i+1, j]
+        v11 = val[i+1, j+1]
+        values = ((1.0 - ta) * ((1.0 - tm) * v00 + tm * v01) +
+                  ta * ((1.0 - tm) * v10 + tm * v11))
+        dAlpha = ((1.0 - tm) * (v10 - v00) + tm * (v11 - v01)) / (self.alpha[i+1] - self.alpha[i])
+        dMach = ((1.0 - ta) * (v01 - v00) + ta * (v11 - v10)) / (self.mach[j+1] - self.mach[j])
+        dAlpha = np.where((alphaQuery < self.alpha[0]) | (alphaQuery > self.alpha[-1]), 0.0, dAlpha)
+        dMach = np.where((machQuery < self.mach[0]) | (machQuery > self.mach[-1]), 0.0, dMach)
+        return values, dAlpha, dMach
+
+
+# Source of version numbers identifying the contents of tables
+_versionCounter = count()
+
+
+# Grid arrays shared between compacted tables, keyed by their contents
+_grids = weakref.WeakValueDictionary()
+
+
+def _internGrid(grid):
+    """ Returns read-only array shared by all interned grids equal to grid """
+    grid = np.array(grid, dtype=float)
+    key = grid.tobytes()
+    shared = _grids.get(key)
+    if shared is None:
+        grid.flags.writeable = False
+        _grids[key] = shared = grid
+    return shared
+
+
+def _nbytes(arrays):
+    """ Returns memory used by arrays in bytes counting shared arrays once """
+    unique = {id(arr): arr.nbytes for arr in arrays}
+    return sum(unique.values())
+
+
+def _isIncreasing(arr):
+    """ Checks if monotonically increasing array """
+    return np.all(np.diff(arr) > 0)
+
+
+def _broadcastQuery(alphaQuery, machQuery):
+    """ Converts query points to float arrays of a common shape """
+    return np.broadcast_arrays(np.asarray(alphaQuery, dtype=float),
+                               np.asarray(machQuery, dtype=float))
+
+
+def _checkOut(out, shape):
+    """ Raises ValueError unless out is None or output arrays of the given shape """
+    if out is None:
+        return
+    for arr in out:
+        if arr.shape != shape or arr.dtype != np.float64 or not arr.flags.c_contiguous:
+            raise ValueError('out should be C-contiguous float64 arrays of shape ' + str(shape))
+
+
+def _findIntervalScalar(grid, width, query):
+    """
+    Returns bracketing interval index and fraction for a single query value
+    Matches _findInterval for grid and width given as lists
+    """
+    if query <= grid[0]:
+        return 0, 0.0
+    if query >= grid[-1]:
+        return len(width) - 1, 1.0
+    if query != query:
+        # NaN is passed through as the fraction, as in _findInterval
+        return len(width) - 1, query
+    indx = bisect_right(grid, query) - 1
+    return indx, (query - grid[indx]) / width[indx]
+
+
+def _findInterval(grid, query):
+    """
+    Returns bracketing interval indices and fractions for query values
+    Queries outside the grid are clamped to its end points
+    """
+    query = np.clip(query, grid[0], grid[-1])
+    indx = np.searchsorted(grid, query, side='right') - 1
+    indx = np.clip(indx, 0, grid.size - 2)
+    frac = (query - grid[indx]) / (grid[indx+1] - grid[indx])
+    return indx, frac
+
+
+def _findIntervalNear(grid, query, hint, search=None):
+    """
+    Returns bracketing interval indices and fractions for query values and
+    no. of queries that needed a full search
+    hint holds the previous interval of each query and is updated in place.
+    Queries in that interval or its neighbours are resolved without a search,
+    the rest use search, defaulting to _findInterval. Results are identical
+    to _findInterval.
+    """
+    query = np.clip(query, grid[0], grid[-1])
+    last = grid.size - 2
+    lo = np.clip(hint - 1, 0, last)
+    hi = np.minimum(lo + 3, last + 1)
+    near = (query >= grid[lo]) & ((query < grid[hi]) | (hi == last + 1))
+    # Count grid points inside the window that are not above the query
+    indx = lo + ((lo + 1 < hi) & (query >= grid[np.minimum(lo + 1, last + 1)]))
+    indx += (lo + 2 < hi) & (query >= grid[np.minimum(lo + 2, last + 1)])
+    indx = np.minimum(indx, last)
+
+    far = np.flatnonzero(~near)
+    if far.size:
+        indx[far] = (search or (lambda values: _findInterval(grid, values)))(query[far])[0]
+    hint[...] = indx
+    frac = (query - grid[indx]) / (grid[indx+1] - grid[indx])
+    return indx, frac, far.size
+
+
+def backend():
+    """ Returns name of the backend used for batched lookups """
+    return _backend
+
+
+def setBackend(name):
+    """
+    Sets backend used for batched lookups
+    'numba' uses compiled kernels and is the default when Numba is installed.
+    'numpy' uses vectorized NumPy operations.
+    """
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError('Unknown backend ' + str(name) + ', choose from ' + ', '.join(BACKENDS))
+    if name == 'numba' and numba is None:
+        raise ValueError('Numba is not installed')
+    _backend = name
+
+
+# Empty GridIndex start array of grids without an index
+_NO_BUCKETS = np.empty(0, dtype=np.int32)
+
+
+def _findCell(bucketGrid, query):
+    """
+    Returns bracketing interval index and fraction as in _findInterval
+    bucketGrid is a tuple of grid and, as from CoeffTable._bucketGrids, the
+    start and scale of its GridIndex, used unless start is empty
+    """
+    grid, start, scale = bucketGrid
+    last = grid.shape[0] - 1
+    if query <= grid[0]:
+        return 0, 0.0
+    if query >= grid[last]:
+        return last - 1, 1.0
+    if query != query:
+        return 0, query
+    if start.shape[0] > 0:
+        # As in GridIndex.findInterval
+        lo = start[min(int((query - grid[0]) * scale), start.shape[0] - 1)]
+        if lo < last - 1 and query >= grid[lo+1]:
+            lo += 1
+        elif lo > 0 and query < grid[lo]:
+            lo -= 1
+        return lo, (query - grid[lo]) / (grid[lo+1] - grid[lo])
+    lo = 0
+    hi = last
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if grid[mid] <= query:
+            lo = mid
+        else:
+            hi = mid
+    return lo, (query - grid[lo]) / (grid[lo+1] - grid[lo])
+
+
+def _blendCell(val, i, ta, j, tm):
+    """ Returns value bilinearly blended over a cell as in CoeffTable._blend """
+    return ((1.0 - ta) * ((1.0 - tm) * val[i, j] + tm * val[i, j+1]) +
+            ta * ((1.0 - tm) * val[i+1, j] + tm * val[i+1, j+1]))
+
+
+def _coeffsKernel(alphaQuery, machQuery,
+                  alphaL, machL, valL, alphaD, machD, valD, alphaM, machM, valM,
+                  sharedCD, sharedCM, outCL, outCD, outCM):
+    """
+    Evaluates CL, CD and CM for flat query arrays into flat output arrays
+    Grids are given as tuples for _findCell.
+    """
+    for k in _prange(alphaQuery.shape[0]):
+        i, ta = _findCell(alphaL, alphaQuery[k])
+        j, tm = _findCell(machL, machQuery[k])
+        outCL[k] = _blendCell(valL, i, ta, j, tm)
+        if sharedCD:
+            outCD[k] = _blendCell(valD, i, ta, j, tm)
+        else:
+            iD, taD = _findCell(alphaD, alphaQuery[k])
+            jD, tmD = _findCell(machD, machQuery[k])
+            outCD[k] = _blendCell(valD, iD, taD, jD, tmD)
+        if sharedCM:
+            outCM[k] = _blendCell(valM, i, ta, j, tm)
+        else:
+            iM, taM = _findCell(alphaM, alphaQuery[k])
+            jM, tmM = _findCell(machM, machQuery[k])
+            outCM[k] = _blendCell(valM, iM, taM, jM, tmM)
+
+
+if numba is None:
+    _prange = range
+    _coeffsKernelParallel = _coeffsKernel
+else:
+    _prange = numba.prange
+    _findCell = numba.njit(cache=True)(_findCell)
+    _blendCell = numba.njit(cache=True)(_blendCell)
+    _coeffsKernelParallel = numba.njit(cache=True, parallel=True)(_coeffsKernel)
+    _coeffsKernel = numba.njit(cache=True)(_coeffsKernel)
+
+
+class GridIndex:
+    """
+    Uniform bucket index mapping values to bracketing grid intervals in O(1)
+    Buckets are narrower than the smallest grid spacing so that each bucket
+    holds at most one grid point. The interval is then the bucket's starting
+    interval or its neighbour. Results are identical to _findInterval.
+    """
+
+    def __init__(self, grid, nbuckets):
+        self.grid = np.asarray(grid, dtype=float)
+        self.width = np.diff(self.grid)
+        self.origin = float(self.grid[0])
+        self.end = float(self.grid[-1])
+        self.scale = nbuckets / (self.end - self.origin)
+        self.lastBucket = nbuckets - 1
+        self.lastInterval = self.grid.size - 2
+
+        edges = self.origin + np.arange(nbuckets) / self.scale
+        self.start = np.clip(np.searchsorted(self.grid, edges, side='right') - 1,
+                             0, self.lastInterval).astype(np.int32)
+        # Arrays allocated by the index, including the grid if it was converted
+        arrays = [self.start, self.width] + ([] if self.grid is grid else [self.grid])
+        self.nbytes = sum(sys.getsizeof(arr) for arr in arrays)
+
+    @classmethod
+    def build(cls, grid, maxBuckets=MAX_BUCKETS):
+        """ Returns an index for grid or None if it needs more than maxBuckets """
+        spacing = np.diff(grid).min()
+        nbuckets = int((grid[-1] - grid[0]) / spacing) + 1
+        if nbuckets > maxBuckets:
+            return None
+        return cls(grid, nbuckets)
+
+    def findInterval(self, query):
+        """ Returns bracketing interval indices and fractions for query values """
+        query = np.clip(query, self.origin, self.end)
+        # fmax maps NaN queries to the first bucket, their fraction stays NaN
+        bucket = np.minimum(np.fmax((query - self.origin) * self.scale, 0.0).astype(np.intp),
+                            self.lastBucket)
+        indx = self.start[bucket].astype(np.intp)
+        # Step to the neighbouring interval if the bucket straddles a grid point
+        indx += (indx < self.lastInterval) & (query >= self.grid[indx+1])
+        indx -= (indx > 0) & (query < self.grid[indx])
+        frac = (query - self.grid[indx]) / self.width[indx]
+        return indx, frac
+
+
+class LookupStats:
+    """
+    LookupStats class for counting lookups on a C81 object
+    Records the no. of queried points, cumulative time in seconds and no. of
+    alpha and mach values outside the table for each coefficient. Time spent
+    in calls returning several coefficients is split evenly between them.
+    """
+
+    _FIELDS = ('queries', 'seconds', 'alphaOutOfRange', 'machOutOfRange')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """ Sets all counters to zero """
+        self.counts = {coeffname: dict.fromkeys(self._FIELDS, 0)
+                       for coeffname in ('CL', 'CD', 'CM')}
+        for counts in self.counts.values():
+            counts['seconds'] = 0.0
+
+    def snapshot(self):
+        """ Returns copy of counters as a dict keyed by coefficient name """
+        return {coeffname: dict(counts) for coeffname, counts in self.counts.items()}
+
+    def record(self, tables, alphaQuery, machQuery, seconds):
+        """ Adds a lookup of query points on tables taking seconds """
+        if np.ndim(alphaQuery) == 0 and np.ndim(machQuery) == 0:
+            npoints = 1
+        else:
+            alphaQuery, machQuery = _broadcastQuery(alphaQuery, machQuery)
+            npoints = alphaQuery.size
+        for coeffname, table in tables:
+            counts = self.counts[coeffname]
+            counts['queries'] += npoints
+            counts['seconds'] += seconds / len(tables)
+            counts['alphaOutOfRange'] += int(np.count_nonzero(
+                (alphaQuery < table.alpha[0]) | (alphaQuery > table.alpha[-1])))
+            counts['machOutOfRange'] += int(np.count_nonzero(
+                (machQuery < table.mach[0]) | (machQuery > table.mach[-1])))
+
+
+# Quantized query keys are kept well within the int64 range
+_MAX_KEY = 2.0**62
+
+
+class LookupCache:
+    """
+    LookupCache class for memoizing single point lookups on a C81 object
+    Query points are quantized to multiples of tolerance and values are
+    evaluated at the quantized points, so that results do not depend on the
+    order of queries. Up to maxsize recently used points are kept for each
+    lookup method and its entries are dropped when one of its tables changes.
+    Batched lookups are not cached, evaluating them takes about as long as
+    finding their points among cached ones. Cached getCoeffs calls are about
+    twice as fast, single coefficients gain little.
+    """
+
+    def __init__(self, maxsize=4096, tolerance=1e-6):
+        self.maxsize = maxsize
+        self.tolerance = tolerance
+        self.hits = 0
+        self.misses = 0
+        self.entries = {}
+        self.versions = {}
+
+    def clear(self):
+        """ Removes all entries """
+        for entries in self.entries.values():
+            entries.clear()
+
+    def info(self):
+        """ Returns dict of hits, misses, current size and maxsize """
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': sum(len(entries) for entries in self.entries.values()),
+                'maxsize': self.maxsize}
+
+    def lookup(self, c81Data, name, tableVersions, alphaQuery, machQuery):
+        """
+        Returns result of C81 lookup method name at a single quantized query point
+        tableVersions returns the versions of the tables used by the method
+        """
+        alphaKey = alphaQuery / self.tolerance
+        machKey = machQuery / self.tolerance
+        if not (abs(alphaKey) < _MAX_KEY and abs(machKey) < _MAX_KEY):
+            # Non-finite and huge queries are not cached
+            return getattr(C81, name)(c81Data, alphaQuery, machQuery)
+        versions = tableVersions(c81Data)
+        entries = self.entries.get(name)
+        if entries is None or self.versions[name] != versions:
+            entries = self.entries[name] = OrderedDict()
+            self.versions[name] = versions
+
+        key = (round(alphaKey), round(machKey))
+        val = entries.get(key)
+        if val is not None:
+            self.hits += 1
+            entries.move_to_end(key)
+            return val
+        self.misses += 1
+        val = getattr(C81, name)(c81Data, key[0] * self.tolerance, key[1] * self.tolerance)
+        entries[key] = val
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+        return val
+
+
 class C81:
     """ C81 class for c81 formatted airfoil tables """
 
+    # Lookup methods and the coefficients they return
+    _LOOKUPS = {'getCL': ('CL',), 'getCD': ('CD',), 'getCM': ('CM',),
+                'getCLArray': ('CL',), 'getCDArray': ('CD',), 'getCMArray': ('CM',),
+                'getCoeffs': ('CL', 'CD', 'CM'), 'getCoeffsArray': ('CL', 'CD', 'CM'),
+                'evaluateCoeffs': ('CL', 'CD', 'CM'),
+                'getCLGradient': ('CL',), 'getCDGradient': ('CD',), 'getCMGradient': ('CM',),
+                'getCoeffsGradient': ('CL', 'CD', 'CM')}
+    # Lookup methods only recorded in statistics, only single points are cached
+    _UNCACHED = ('getCLArray', 'getCDArray', 'getCMArray', 'getCoeffsArray', 'evaluateCoeffs',
+                 'getCLGradient', 'getCDGradient', 'getCMGradient', 'getCoeffsGradient')
+
     def __init__(self, airfoilname, \
                  alpha_L, mach_l, CL, \
                  alpha_D, mach_d, CD, \
@@ -50,16 +782,32 @@ class C81:
                             alpha_D=alpha_D, mach_d=mach_d, CD=CD,
                             alpha_M=alpha_M, mach_m=mach_m, CM=CM)
 
+        self._initTables(airfoilname,
+                         CoeffTable(np.array(alpha_L), np.array(mach_l), np.array(CL), 'CL'),
+                         CoeffTable(np.array(alpha_D), np.array(mach_d), np.array(CD), 'CD'),
+                         CoeffTable(np.array(alpha_M), np.array(mach_m), np.array(CM), 'CM'))
+
+    @classmethod
+    def _fromTables(cls, airfoilname, CL, CD, CM):
+        """ Creates C81 object from CoeffTable objects without copying their arrays """
+        c81Data = cls.__new__(cls)
+        c81Data._initTables(airfoilname, CL, CD, CM)
+        return c81Data
+
+    def _initTables(self, airfoilname, CL, CD, CM):
+        """ Sets tables after checking their dimensions """
         self.airfoilname = airfoilname
-        self.CL = CoeffTable(np.array(alpha_L), np.array(mach_l), np.array(CL))
-        self.CD = CoeffTable(np.array(alpha_D), np.array(mach_d), np.array(CD))
-        self.CM = CoeffTable(np.array(alpha_M), np.array(mach_m), np.array(CM))
+        self.CL = CL
+        self.CD = CD
+        self.CM = CM
 
         self.CL.checkdim('CL')
         self.CD.checkdim('CD')
         self.CM.checkdim('CM')
 
-        self.refreshInterpolation()
+        self._sharingKey = None
+        self._stats = None
+        self._cache = None
 
     def __repr__(self):
         strout = ('C81 dataset ' +
@@ -70,11 +818,28 @@ class C81:
         return strout
 
     def __eq__(self, other):
-        ret = []
-        ret.append([self.CL.alpha.tolist() == other.CL.alpha.tolist()])
-        ret.append([self.CL.mach.tolist() == other.CL.mach.tolist()])
-        ret.append(self.CL.val.tolist() == other.CL.val.tolist())
-        return all(ret)
+        """
+        Checks if CL, CD and CM tables have equal values, ignoring airfoilname
+        Fingerprints are compared first to tell most unequal tables apart.
+        Values are compared as floats, so that NaN is never equal.
+        """
+        if not isinstance(other, C81):
+            return NotImplemented
+        if self.fingerprint() != other.fingerprint():
+            return False
+        return all(np.array_equal(getattr(getattr(self, coeffname), field),
+                                  getattr(getattr(other, coeffname), field))
+                   for coeffname in ('CL', 'CD', 'CM') for field in ('alpha', 'mach', 'val'))
+
+    def fingerprint(self):
+        """
+        Returns hex digest of the contents of CL, CD and CM tables
+        The airfoil name is not included, so that the same tables under
+        different names have equal fingerprints.
+        """
+        return hashlib.blake2b(''.join([self.CL.fingerprint(), self.CD.fingerprint(),
+                                        self.CM.fingerprint()]).encode('ascii'),
+                               digest_size=16).hexdigest()
 
     @staticmethod
     def _checkdatatype(airfoilname, **kwargs):
@@ -99,46 +864,675 @@ class C81:
     @staticmethod
     def _isIncreasing(arr):
         """ Checks if monotonically increasing array """
-        return np.all(np.diff(arr) > 0)
+        return _isIncreasing(arr)
+
+    @property
+    def _interpCL(self):
+        return self.CL.interpolator
+
+    @property
+    def _interpCD(self):
+        return self.CD.interpolator
+
+    @property
+    def _interpCM(self):
+        return self.CM.interpolator
 
     def refreshInterpolation(self):
-        """ Refreshes the interpolating functions. """
-        """ May be used when data has been changed manually. """
-        # Ensure alpha and mach are strictly increasing
-        if not self._isIncreasing(self.CL.alpha):
-            raise ValueError('alpha CL should be strictly increasing')
-        if not self._isIncreasing(self.CL.mach):
-            raise ValueError('mach CL should be strictly increasing')
-        if not self._isIncreasing(self.CD.alpha):
-            raise ValueError('alpha CD should be strictly increasing')
-        if not self._isIncreasing(self.CD.mach):
-            raise ValueError('mach CD should be strictly increasing')
-        if not self._isIncreasing(self.CM.alpha):
-            raise ValueError('alpha CM should be strictly increasing')
-        if not self._isIncreasing(self.CM.mach):
-            raise ValueError('mach CM should be strictly increasing')
-
-        self._interpCL = RectBivariateSpline( self.CL.alpha, self.CL.mach, \
-                                            self.CL.val, kx=1, ky=1)
-        self._interpCD = RectBivariateSpline( self.CD.alpha, self.CD.mach, \
-                                            self.CD.val, kx=1, ky=1)
-        self._interpCM = RectBivariateSpline( self.CM.alpha, self.CM.mach, \
-                                            self.CM.val, kx=1, ky=1)
+        """
+        Refreshes the interpolating functions
+        These are otherwise built lazily on first use of each coefficient and
+        rebuilt after table arrays are assigned. May be used when data has been
+        changed in place.
+        """
+        self.CL.markDirty()
+        self.CD.markDirty()
+        self.CM.markDirty()
+        self.CL._build()
+        self.CD._build()
+        self.CM._build()
+        if self._cache is not None:
+            self._cache.clear()
+
+    def nbytes(self):
+        """ Returns memory used by table arrays in bytes counting shared arrays once """
+        return _nbytes([getattr(table, field)
+                        for table in (self.CL, self.CD, self.CM)
+                        for field in ('alpha', 'mach', 'val')])
+
+    def compact(self, dtype=np.float32):
+        """
+        Switches to compact storage of tables
+        Values are stored as dtype and identical alpha and mach grids are shared
+        between coefficients and other compacted airfoils.
+        Returns the memory saved in bytes
+        """
+        nbytes = self.nbytes()
+        self.CL.compact(dtype)
+        self.CD.compact(dtype)
+        self.CM.compact(dtype)
+        return nbytes - self.nbytes()
+
+    def _gridSharing(self):
+        """ Returns if CD and CM tables are on the same grid as CL table """
+        key = (self.CL._version, self.CD._version, self.CM._version)
+        if key != self._sharingKey:
+            # Tables on identical grids can share a single cell search
+            self._sharedGrids = (self.CL.sameGrid(self.CD), self.CL.sameGrid(self.CM))
+            self._sharingKey = key
+        return self._sharedGrids
+
+    def buildIndex(self, maxBuckets=MAX_BUCKETS):
+        """
+        Builds constant-time alpha and mach lookup indices for all tables
+        Indices speed up batched lookups, single values are still bisected.
+        The indices are rebuilt along with the interpolating functions until
+        dropIndex is called.
+        Returns the memory used by the indices in bytes
+        """
+        return (self.CL.buildIndex(maxBuckets) +
+                self.CD.buildIndex(maxBuckets) +
+                self.CM.buildIndex(maxBuckets))
+
+    def dropIndex(self):
+        """ Removes lookup indices from all tables """
+        self.CL.dropIndex()
+        self.CD.dropIndex()
+        self.CM.dropIndex()
+
+    def enableStats(self):
+        """
+        Starts recording lookup statistics and returns the LookupStats object
+        Lookups are not instrumented, and cost nothing extra, while disabled.
+        """
+        if self._stats is None:
+            self._stats = LookupStats()
+            self._installHooks()
+        return self._stats
+
+    def disableStats(self):
+        """ Stops recording lookup statistics """
+        self._stats = None
+        self._installHooks()
+
+    def stats(self):
+        """ Returns snapshot of lookup statistics or None if disabled """
+        if self._stats is None:
+            return None
+        return self._stats.snapshot()
+
+    def resetStats(self):
+        """ Sets lookup statistics to zero """
+        if self._stats is not None:
+            self._stats.reset()
+
+    def enableCache(self, maxsize=4096, tolerance=1e-6):
+        """
+        Starts memoizing single point lookups and returns the LookupCache object
+        Queries are quantized to multiples of tolerance, see LookupCache.
+        Batched and gradient lookups are not cached.
+        """
+        self._cache = LookupCache(maxsize, tolerance)
+        self._installHooks()
+        return self._cache
+
+    def disableCache(self):
+        """ Stops memoizing lookups """
+        self._cache = None
+        self._installHooks()
+
+    def cacheInfo(self):
+        """ Returns dict of cache hits, misses and sizes or None if disabled """
+        if self._cache is None:
+            return None
+        return self._cache.info()
+
+    def _installHooks(self):
+        """ Shadows lookup methods with cached and instrumented ones as per current settings """
+        for name, coeffnames in self._LOOKUPS.items():
+            self.__dict__.pop(name, None)
+            if self._cache is not None and name not in self._UNCACHED:
+                setattr(self, name, self._cached(name, coeffnames))
+            if self._stats is not None:
+                setattr(self, name, self._instrumented(getattr(self, name), coeffnames))
+
+    def _cached(self, name, coeffnames):
+        """ Returns lookup method answering from the cache """
+        cache = self._cache
+        tableVersions = attrgetter(*[coeffname + '._version' for coeffname in coeffnames])
+
+        def cachedLookup(alphaQuery, machQuery):
+            return cache.lookup(self, name, tableVersions, alphaQuery, machQuery)
+        cachedLookup.__doc__ = getattr(C81, name).__doc__
+        return cachedLookup
+
+    def _instrumented(self, method, coeffnames):
+        """ Returns lookup method wrapped to record statistics """
+        stats = self._stats
+
+        def lookup(alphaQuery, machQuery, *args, **kwargs):
+            start = time.perf_counter()
+            result = method(alphaQuery, machQuery, *args, **kwargs)
+            seconds = time.perf_counter() - start
+            stats.record([(coeffname, getattr(self, coeffname)) for coeffname in coeffnames],
+                         alphaQuery, machQuery, seconds)
+            return result
+        lookup.__doc__ = method.__doc__
+        return lookup
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in self._LOOKUPS:
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._installHooks()
 
     def getCL(self, alphaQuery, machQuery):
         """ Returns bilinearly interpolated CL value """
-        return self._interpCL(alphaQuery, machQuery)[0][0]
+        return self.CL.interpolateScalar(alphaQuery, machQuery)
 
     def getCD(self, alphaQuery, machQuery):
         """ Returns bilinearly interpolated CD value """
-        return self._interpCD(alphaQuery, machQuery)[0][0]
+        return self.CD.interpolateScalar(alphaQuery, machQuery)
 
     def getCM(self, alphaQuery, machQuery):
         """ Returns bilinearly interpolated CM value """
-        return self._interpCM(alphaQuery, machQuery)[0][0]
+        return self.CM.interpolateScalar(alphaQuery, machQuery)
+
+    def getCLArray(self, alphaQuery, machQuery):
+        """ Returns bilinearly interpolated CL values for arrays of query points """
+        return self.CL.interpolate(alphaQuery, machQuery)
+
+    def getCDArray(self, alphaQuery, machQuery):
+        """ Returns bilinearly interpolated CD values for arrays of query points """
+        return self.CD.interpolate(alphaQuery, machQuery)
+
+    def getCMArray(self, alphaQuery, machQuery):
+        """ Returns bilinearly interpolated CM values for arrays of query points """
+        return self.CM.interpolate(alphaQuery, machQuery)
+
+    def getCoeffs(self, alphaQuery, machQuery):
+        """ Returns bilinearly interpolated CL, CD and CM values """
+        sharedCD, sharedCM = self._gridSharing()
+        cell = self.CL._locateScalar(alphaQuery, machQuery)
+        cellCD = cell if sharedCD else self.CD._locateScalar(alphaQuery, machQuery)
+        cellCM = cell if sharedCM else self.CM._locateScalar(alphaQuery, machQuery)
+        return self.CL._blendScalar(cell), self.CD._blendScalar(cellCD), self.CM._blendScalar(cellCM)
+
+    def getCoeffsArray(self, alphaQuery, machQuery):
+        """
+        Returns bilinearly interpolated CL, CD and CM values for arrays of query points
+        The bracketing cell is searched once and reused by tables on identical grids
+        """
+        return self._evaluateCoeffs(alphaQuery, machQuery)
+
+    def evaluateCoeffs(self, alphaQuery, machQuery, out=None, parallel=False):
+        """
+        Returns CL, CD and CM values for arrays of query points using the
+        current backend, see setBackend
+        out may be a tuple of three C-contiguous float64 arrays with the
+        broadcast shape of the queries, which are then filled and returned.
+        The numba backend evaluates all coefficients in a single loop, spread
+        over cores if parallel is True. Both backends give identical results.
+        Numba's thread pool is not fork-safe, so avoid parallel in processes
+        that later fork workers, as convertXfoil does.
+        """
+        return self._evaluateCoeffs(alphaQuery, machQuery, out, parallel)
+
+    def _evaluateCoeffs(self, alphaQuery, machQuery, out=None, parallel=False):
+        """ Returns CL, CD and CM values as evaluateCoeffs, without lookup hooks """
+        alphaQuery, machQuery = _broadcastQuery(alphaQuery, machQuery)
+        _checkOut(out, alphaQuery.shape)
+        sharedCD, sharedCM = self._gridSharing()
+
+        if _backend == 'numba':
+            scalar = out is None and alphaQuery.ndim == 0
+            if out is None:
+                out = tuple(np.empty(alphaQuery.shape) for coeffname in ('CL', 'CD', 'CM'))
+            for table in (self.CL, self.CD, self.CM):
+                if table._dirty:
+                    table._build()
+            kernel = _coeffsKernelParallel if parallel else _coeffsKernel
+            kernel(np.ascontiguousarray(alphaQuery).reshape(-1),
+                   np.ascontiguousarray(machQuery).reshape(-1),
+                   *self.CL._bucketGrids(), self.CL.val,
+                   *self.CD._bucketGrids(), self.CD.val,
+                   *self.CM._bucketGrids(), self.CM.val,
+                   sharedCD, sharedCM,
+                   out[0].reshape(-1), out[1].reshape(-1), out[2].reshape(-1))
+            if scalar:
+                # Match the NumPy path, which returns scalars for scalar queries
+                return tuple(arr[()] for arr in out)
+            return out
+
+        cell = self.CL._locate(alphaQuery, machQuery)
+        cellCD = cell if sharedCD else self.CD._locate(alphaQuery, machQuery)
+        cellCM = cell if sharedCM else self.CM._locate(alphaQuery, machQuery)
+        vals = self.CL._blend(cell), self.CD._blend(cellCD), self.CM._blend(cellCM)
+        if out is None:
+            return vals
+        for arr, val in zip(out, vals):
+            arr[...] = val
+        return out
+
+    def cursor(self, npoints):
+        """
+        Returns QueryCursor for repeated lookups at npoints moving points
+        Each call then takes arrays of npoints alpha and mach values.
+        """
+        return QueryCursor(self, npoints)
+
+    def getAlphaForCL(self, CLQuery, machQuery, alphaRange=None, preStall=None,
+                      allSolutions=False):
+        """
+        Returns alpha at which CL equals CLQuery for arrays of query points
+        See CoeffTable.solveAlpha for the options
+        """
+        return self.CL.solveAlpha(CLQuery, machQuery, alphaRange, preStall, allSolutions)
+
+    def getCLGradient(self, alphaQuery, machQuery):
+        """ Returns CL values and their derivatives with respect to alpha and mach """
+        return self.CL.interpolateGradient(alphaQuery, machQuery)
+
+    def getCDGradient(self, alphaQuery, machQuery):
+        """ Returns CD values and their derivatives with respect to alpha and mach """
+        return self.CD.interpolateGradient(alphaQuery, machQuery)
+
+    def getCMGradient(self, alphaQuery, machQuery):
+        """ Returns CM values and their derivatives with respect to alpha and mach """
+        return self.CM.interpolateGradient(alphaQuery, machQuery)
+
+    def getCoeffsGradient(self, alphaQuery, machQuery):
+        """
+        Returns CL, CD and CM values and derivatives for arrays of query points
+        Each coefficient is a tuple of values, alpha derivatives and mach derivatives
+        """
+        alphaQuery, machQuery = _broadcastQuery(alphaQuery, machQuery)
+        sharedCD, sharedCM = self._gridSharing()
+        cell = self.CL._locate(alphaQuery, machQuery)
+        cellCD = cell if sharedCD else self.CD._locate(alphaQuery, machQuery)
+        cellCM = cell if sharedCM else self.CM._locate(alphaQuery, machQuery)
+        return (self.CL._blendGradient(cell, alphaQuery, machQuery),
+                self.CD._blendGradient(cellCD, alphaQuery, machQuery),
+                self.CM._blendGradient(cellCM, alphaQuery, machQuery))
+
+
+class QueryCursor:
+    """
+    QueryCursor class for repeated lookups at a fixed no. of moving points
+    The bracketing cell of each tracked point is remembered between calls.
+    A point that stays in its cell or moves to a neighbouring one is found
+    without a search, so lookups of slowly moving points, such as blade
+    elements in time-marching simulations, cost nearly the same for any
+    table size. Results are identical to C81.getCoeffsArray.
+    """
+
+    def __init__(self, c81Data, npoints):
+        self.c81Data = c81Data
+        self.npoints = 0
+        self._hints = {}
+        self.hits = 0
+        self.misses = 0
+        self.resize(npoints)
+
+    def __repr__(self):
+        return 'QueryCursor(' + self.c81Data.airfoilname.strip() + ', ' + \
+                str(self.npoints) + ' points)'
+
+    def resize(self, npoints):
+        """ Changes no. of tracked points, keeping cells of the remaining points """
+        kept = min(npoints, self.npoints)
+        for coeffname, hint in self._hints.items():
+            self._hints[coeffname] = np.zeros((2, npoints), dtype=np.intp)
+            self._hints[coeffname][:, :kept] = hint[:, :kept]
+        self.npoints = npoints
+
+    def reset(self):
+        """ Forgets cells of all tracked points and the no. of hits and misses """
+        self._hints.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        """
+        Returns dict of no. of tracked points, and no. of coordinates found
+        near their previous cell (hits) or searched over the grid (misses)
+        """
+        return {'npoints': self.npoints, 'hits': self.hits, 'misses': self.misses}
+
+    def _locate(self, coeffname, alphaQuery, machQuery):
+        """ Returns cells of tracked points in table of coeffname """
+        if coeffname not in self._hints:
+            self._hints[coeffname] = np.zeros((2, self.npoints), dtype=np.intp)
+        hint = self._hints[coeffname]
+        cell, searched = getattr(self.c81Data, coeffname)._locateNear(
+            alphaQuery, machQuery, hint[0], hint[1])
+        self.hits += 2 * self.npoints - searched
+        self.misses += searched
+        return cell
+
+    def _query(self, alphaQuery, machQuery):
+        """ Returns queries as float arrays of the no. of tracked points """
+        alphaQuery, machQuery = _broadcastQuery(alphaQuery, machQuery)
+        if alphaQuery.shape != (self.npoints,):
+            raise ValueError('Expected ' + str(self.npoints) + ' query points, got shape ' +
+                             str(alphaQuery.shape))
+        return alphaQuery, machQuery
+
+    def getCoeffs(self, alphaQuery, machQuery):
+        """ Returns bilinearly interpolated CL, CD and CM values at the tracked points """
+        alphaQuery, machQuery = self._query(alphaQuery, machQuery)
+        c81Data = self.c81Data
+        sharedCD, sharedCM = c81Data._gridSharing()
+        cell = self._locate('CL', alphaQuery, machQuery)
+        cellCD = cell if sharedCD else self._locate('CD', alphaQuery, machQuery)
+        cellCM = cell if sharedCM else self._locate('CM', alphaQuery, machQuery)
+        return c81Data.CL._blend(cell), c81Data.CD._blend(cellCD), c81Data.CM._blend(cellCM)
+
+    def getCL(self, alphaQuery, machQuery):
+        """ Returns bilinearly interpolated CL values at the tracked points """
+        return self.c81Data.CL._blend(self._locate('CL', *self._query(alphaQuery, machQuery)))
+
+    def getCD(self, alphaQuery, machQuery):
+        """ Returns bilinearly interpolated CD values at the tracked points """
+        return self.c81Data.CD._blend(self._locate('CD', *self._query(alphaQuery, machQuery)))
+
+    def getCM(self, alphaQuery, machQuery):
+        """ Returns bilinearly interpolated CM values at the tracked points """
+        return self.c81Data.CM._blend(self._locate('CM', *self._query(alphaQuery, machQuery)))
+
+
+class TableRegistry:
+    """
+    TableRegistry class for sharing identical tables among airfoils
+    Tables are keyed by coefficient name and fingerprint, so that airfoils
+    with identical tables, possibly under different names or from different
+    files, use one CoeffTable and build its interpolation data once.
+    Registered tables are held weakly. Shared tables should be replaced
+    rather than modified, as changes apply to every airfoil using them.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._tables = weakref.WeakValueDictionary()
+
+    def __len__(self):
+        return len(self._tables)
+
+    def info(self):
+        """ Returns dict of hits, misses and no. of registered tables """
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._tables)}
+
+    def intern(self, table):
+        """ Returns registered table identical to table, registering it if there is none """
+        key = (table.coeffname, table.fingerprint())
+        shared = self._tables.get(key)
+        # Drop entries of tables modified after registering
+        if shared is not None and shared.fingerprint() != key[1]:
+            shared = None
+        if shared is None:
+            self.misses += 1
+            self._tables[key] = table
+            return table
+        if shared is not table:
+            self.hits += 1
+        return shared
+
+    def register(self, c81Data):
+        """ Replaces tables of C81 object with registered identical tables and returns it """
+        c81Data.CL = self.intern(c81Data.CL)
+        c81Data.CD = self.intern(c81Data.CD)
+        c81Data.CM = self.intern(c81Data.CM)
+        return c81Data
+
+
+class AirfoilDatabase:
+    """
+    AirfoilDatabase class for airfoils placed along a blade
+    Airfoils are keyed by a station value such as radial station or thickness
+    ratio. Coefficients are interpolated linearly between the airfoils at the
+    neighbouring stations and clamped beyond the first and last station.
+    """
+
+    def __init__(self, stations, airfoils):
+        self.stations = np.array(stations, dtype=float)
+        self.airfoils = list(airfoils)
+
+        if len(self.stations.shape) != 1:
+            raise ValueError('Wrong dimensions for stations')
+        if self.stations.size != len(self.airfoils):
+            raise ValueError('Inconsistent no. of stations and airfoils')
+        if self.stations.size < 1:
+            raise ValueError('Atleast one airfoil required')
+        if not _isIncreasing(self.stations):
+            raise ValueError('stations should be strictly increasing')
+        for airfoil in self.airfoils:
+            if not isinstance(airfoil, C81):
+                raise TypeError('Airfoils should be C81 objects')
+
+    def __repr__(self):
+        strout = 'Airfoil database'
+        for station, airfoil in zip(self.stations, self.airfoils):
+            strout += '\n  ' + '{:g}'.format(station) + ' : ' + airfoil.airfoilname.strip()
+        return strout
+
+    def __len__(self):
+        return len(self.airfoils)
+
+    def getCLArray(self, stationQuery, alphaQuery, machQuery):
+        """ Returns CL values blended between stations for arrays of query points """
+        return self._blend(stationQuery, alphaQuery, machQuery,
+                           lambda airfoil, alpha, mach: (airfoil.getCLArray(alpha, mach),))[0]
+
+    def getCDArray(self, stationQuery, alphaQuery, machQuery):
+        """ Returns CD values blended between stations for arrays of query points """
+        return self._blend(stationQuery, alphaQuery, machQuery,
+                           lambda airfoil, alpha, mach: (airfoil.getCDArray(alpha, mach),))[0]
+
+    def getCMArray(self, stationQuery, alphaQuery, machQuery):
+        """ Returns CM values blended between stations for arrays of query points """
+        return self._blend(stationQuery, alphaQuery, machQuery,
+                           lambda airfoil, alpha, mach: (airfoil.getCMArray(alpha, mach),))[0]
+
+    def getCoeffsArray(self, stationQuery, alphaQuery, machQuery):
+        """ Returns CL, CD and CM values blended between stations for arrays of query points """
+        return self._blend(stationQuery, alphaQuery, machQuery,
+                           lambda airfoil, alpha, mach: airfoil.getCoeffsArray(alpha, mach))
+
+    def _blend(self, stationQuery, alphaQuery, machQuery, evaluate):
+        """
+        Returns tuple of arrays blended between stations
+        evaluate(airfoil, alpha, mach) is called once per airfoil on the query
+        points adjacent to its station and returns a tuple of arrays.
+        """
+        stationQuery, alphaQuery, machQuery = np.broadcast_arrays(
+            np.asarray(stationQuery, dtype=float),
+            np.asarray(alphaQuery, dtype=float),
+            np.asarray(machQuery, dtype=float))
+        if len(self.airfoils) == 1:
+            return evaluate(self.airfoils[0], alphaQuery, machQuery)
+
+        k, t = _findInterval(self.stations, stationQuery)
+        # Evaluate on no points for the no. of arrays, so empty queries work
+        empty = np.empty(0)
+        result = tuple(np.zeros(stationQuery.shape)
+                       for val in evaluate(self.airfoils[0], empty, empty))
+        for n, airfoil in enumerate(self.airfoils):
+            lower = k == n
+            upper = k == n - 1
+            select = lower | upper
+            if not np.any(select):
+                continue
+            weight = np.where(lower, 1.0 - t, t)[select]
+            values = evaluate(airfoil, alphaQuery[select], machQuery[select])
+            for out, val in zip(result, values):
+                out[select] += weight * val
+        return result
+
+
+class AirfoilLibrary:
+    """
+    AirfoilLibrary class for indexed access to airfoils in many C81 files
+    Files are scanned once for the name, table sizes and byte offset of each
+    airfoil. Scanning reads each file once but only parses the 42 character
+    headers, table values are skipped. Files are decoded as latin-1, so
+    names in any 8-bit encoding are indexed. Tables are parsed when an
+    airfoil is first accessed and up to maxsize recently used airfoils are
+    kept. If indexFile is given, the index is stored there as JSON and files
+    are rescanned only when their size or modification time changes.
+    compact and registry are passed on to load.
+    """
+
+    def __init__(self, paths, indexFile=None, maxsize=32, compact=False, registry=None):
+        if isinstance(paths, str):
+            paths = [paths]
+        self.indexFile = indexFile
+        self.maxsize = maxsize
+        self.compact = compact
+        self.registry = registry
+        self.hits = 0
+        self.misses = 0
+        self._parsed = OrderedDict()
+
+        stored = {}
+        if indexFile is not None and os.path.isfile(indexFile):
+            with open(indexFile, 'r') as fh:
+                stored = json.load(fh).get('files', {})
+
+        self._files = OrderedDict()
+        rescanned = False
+        for filename in _findFiles(paths):
+            stamp = _sourceStamp(filename, withHash=False)
+            record = stored.get(filename)
+            if (record is None or record['size'] != stamp['size'] or
+                    record['mtime_ns'] != stamp['mtime_ns']):
+                record = dict(stamp, airfoils=_scanC81File(filename))
+                rescanned = True
+            self._files[filename] = record
+
+        self._entries = OrderedDict()
+        for filename, record in self._files.items():
+            for entry in record['airfoils']:
+                if entry['name'] in self._entries:
+                    raise ValueError('Airfoil ' + entry['name'] + ' in ' + filename +
+                                     ' is also in ' + self._entries[entry['name']]['source'])
+                self._entries[entry['name']] = dict(entry, source=filename)
+
+        if indexFile is not None and (rescanned or set(stored) != set(self._files)):
+            tmpname = indexFile + '.tmp' + str(os.getpid())
+            with open(tmpname, 'w') as fh:
+                json.dump({'files': self._files}, fh)
+            os.replace(tmpname, indexFile)
+
+    def __repr__(self):
+        return 'AirfoilLibrary(' + str(len(self)) + ' airfoils in ' + \
+                str(len(self._files)) + ' files)'
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def keys(self):
+        """ Returns names of indexed airfoils with surrounding spaces removed """
+        return self._entries.keys()
+
+    def entry(self, name):
+        """
+        Returns dict of source file, byte offset and length, and no. of mach
+        and alpha values of CL, CD and CM sections of airfoil
+        """
+        return dict(self._entries[name])
+
+    def __getitem__(self, name):
+        """ Returns C81 object of airfoil, parsing its tables on first access """
+        c81Data = self._parsed.get(name)
+        if c81Data is not None:
+            self.hits += 1
+            self._parsed.move_to_end(name)
+            return c81Data
+
+        entry = self._entries[name]
+        self.misses += 1
+        with open(entry['source'], 'rb') as fh:
+            fh.seek(entry['offset'])
+            text = fh.read(entry['length']).decode('latin-1')
+        c81Data = load(io.StringIO(text), compact=self.compact, registry=self.registry)
+        self._parsed[name] = c81Data
+        if len(self._parsed) > self.maxsize:
+            self._parsed.popitem(last=False)
+        return c81Data
+
+    def cacheInfo(self):
+        """ Returns dict of hits, misses, current size and maxsize of parsed airfoils """
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self._parsed), 'maxsize': self.maxsize}
+
+    def clearCache(self):
+        """ Removes all parsed airfoils """
+        self._parsed.clear()
+
+
+def _findFiles(paths, suffix='.c81'):
+    """
+    Returns absolute paths of files, glob matches and files in directories
+    Files in directories are taken if their suffix matches, ignoring case.
+    Duplicates are dropped, keeping the first occurrence.
+    """
+    filenames = []
+    for pattern in paths:
+        if os.path.isdir(pattern):
+            filenames.extend(sorted(filename for filename in glob.glob(os.path.join(pattern, '*'))
+                                    if filename.lower().endswith(suffix)))
+        else:
+            filenames.extend(sorted(glob.glob(pattern)))
+    return list(OrderedDict.fromkeys(os.path.abspath(filename) for filename in filenames))
+
+
+def _scanC81File(filename):
+    """ Returns list of dicts of name, byte offset, length and sizes of airfoils in file """
+    airfoils = []
+    offset = 0
+    lineno = 0
+    with open(filename, 'rb') as fh:
+        for line in fh:
+            lineno += 1
+            if not line.strip():
+                offset += len(line)
+                continue
+            try:
+                airfoilname, sizes = _parseHeader(line.decode('latin-1'))
+            except ValueError:
+                raise ValueError('Invalid header at line ' + str(lineno) + ' of ' + filename)
+
+            nlines = sum(_sectionLines(sizes[indx], sizes[indx+1]) for indx in (0, 2, 4))
+            tableLines = list(islice(fh, nlines))
+            if len(tableLines) < nlines:
+                raise ValueError('Unexpected end of file in ' + airfoilname.strip() +
+                                 ' of ' + filename)
+            length = len(line) + sum(map(len, tableLines))
+            lineno += nlines
+            airfoils.append({'name': airfoilname.strip(), 'offset': offset,
+                             'length': length, 'sizes': list(sizes)})
+            offset += length
+    return airfoils
+
 
 def dump(c81Data, fileObject):
     """ Write airfoil tables to C81 formatted file """
+    fileObject.write(dumps(c81Data))
+
+
+def dumps(c81Data):
+    """ Returns airfoil tables as a C81 formatted string """
     lengths = ''
     lengths = lengths + '{:02d}'.format(c81Data.CL.mach.size)
     lengths = lengths + '{:02d}'.format(c81Data.CL.alpha.size)
@@ -148,123 +1542,776 @@ def dump(c81Data, fileObject):
     lengths = lengths + '{:02d}'.format(c81Data.CM.alpha.size)
 
     # Header
-    line = '{:30.30}{:12.12}'.format(c81Data.airfoilname, lengths)
-    fileObject.write(line + '\n')
+    header = '{:30.30}{:12.12}'.format(c81Data.airfoilname, lengths)
 
-    spaces7 = '       '
+    return '\n'.join([header,
+                      _formatSection(c81Data.CL),
+                      _formatSection(c81Data.CD),
+                      _formatSection(c81Data.CM)]) + '\n'
 
-    def wrapline(lineString, chars=70):
-        if len(lineString) > chars:
-            return lineString[:chars] + '\n' + spaces7 + lineString[chars:]
-        else:
-            return lineString
-
-    # Lift section
-    line = spaces7
-    for val in c81Data.CL.mach:
-        line += '{:7.3f}'.format(val)
-    line = wrapline(line)
-    fileObject.write(line + '\n')
-    for indx, val in enumerate(c81Data.CL.alpha):
-        line = '{:7.2f}'.format(val)
-        for CLval in c81Data.CL.val[indx]:
-            line += '{:7.3f}'.format(CLval)
-        line = wrapline(line)
-        fileObject.write(line + '\n')
-
-    # Drag section
-    line = spaces7
-    for val in c81Data.CD.mach:
-        line += '{:7.3f}'.format(val)
-    line = wrapline(line)
-    fileObject.write(line + '\n')
-    for indx, val in enumerate(c81Data.CD.alpha):
-        line = '{:7.2f}'.format(val)
-        for CDval in c81Data.CD.val[indx]:
-            line += '{:7.3f}'.format(CDval)
-        line = wrapline(line)
-        fileObject.write(line + '\n')
-
-    # Moment section
-    line = spaces7
-    for val in c81Data.CM.mach:
-        line += '{:7.3f}'.format(val)
-    line = wrapline(line)
-    fileObject.write(line + '\n')
-    for indx, val in enumerate(c81Data.CM.alpha):
-        line = '{:7.2f}'.format(val)
-        for CMval in c81Data.CM.val[indx]:
-            line += '{:7.3f}'.format(CMval)
-        line = wrapline(line)
-        fileObject.write(line + '\n')
-
-
-def load(fileObject):
-    """ Read airfoil tables from C81 formatted file """
-    header = fileObject.readline().rstrip()
-    airfoilname = header[0:30]
-    nmach_l = int(header[30:32])
-    nalpha_L = int(header[32:34])
-    nmach_d = int(header[34:36])
-    nalpha_D = int(header[36:38])
-    nmach_m = int(header[38:40])
-    nalpha_M = int(header[40:42])
-
-    # LIFT
-    multilinedata = nmach_l > 9
-    # Read mach values
-    mach_l = fileObject.readline().rstrip()
-    if multilinedata:
-        mach_l = mach_l + fileObject.readline().rstrip()
-    mach_l = list(map(float, mach_l.split()))
-    # Read alpha and coeff. values
-    alpha_L = []
-    CL = []
-    for i in range(nalpha_L):
-        line = fileObject.readline().rstrip()
-        if multilinedata:
-            line = line + fileObject.readline().rstrip()
-        line = list(map(float, line.split()))
-        alpha_L = alpha_L + [line[0]]
-        CL = CL + [line[1:]]
-
-    # DRAG
-    multilinedata = nmach_d > 9
-    # Read mach values
-    mach_d = fileObject.readline().rstrip()
-    if multilinedata:
-        mach_d = mach_d + fileObject.readline().rstrip()
-    mach_d = list(map(float, mach_d.split()))
-    # Read alpha and coeff. values
-    alpha_D = []
-    CD = []
-    for i in range(nalpha_D):
-        line = fileObject.readline().rstrip()
-        if multilinedata:
-            line = line + fileObject.readline().rstrip()
-        line = list(map(float, line.split()))
-        alpha_D = alpha_D + [line[0]]
-        CD = CD + [line[1:]]
-
-    # MOMENT
-    multilinedata = nmach_m > 9
-    # Read mach values
-    mach_m = fileObject.readline().rstrip()
-    if multilinedata:
-        mach_m = mach_m + fileObject.readline().rstrip()
-    mach_m = list(map(float, mach_m.split()))
-    # Read alpha and coeff. values
-    alpha_M = []
-    CM = []
-    for i in range(nalpha_M):
-        line = fileObject.readline().rstrip()
-        if multilinedata:
-            line = line + fileObject.readline().rstrip()
-        line = list(map(float, line.split()))
-        alpha_M = alpha_M + [line[0]]
-        CM = CM + [line[1:]]
+
+_spaces7 = '       '
+
+
+def _wrapline(lineString, chars=70):
+    """ Wraps lines longer than chars onto an indented second line """
+    if len(lineString) > chars:
+        return lineString[:chars] + '\n' + _spaces7 + lineString[chars:]
+    else:
+        return lineString
+
+
+def _formatSection(table):
+    """ Returns lines of a section as a string without the trailing newline """
+    nmach = table.mach.size
+    lines = [_spaces7 + ('{:7.3f}' * nmach).format(*table.mach.tolist())]
+    rowFormat = '{:7.2f}' + '{:7.3f}' * nmach
+    val = table.val
+    if val.dtype != np.float64:
+        # Widen compact values through their shortest repr, so that they
+        # round as the decimal values they were parsed from
+        val = val.astype(str).astype(float)
+    rows = np.column_stack((table.alpha, val)).tolist()
+    lines.extend(rowFormat.format(*row) for row in rows)
+    return '\n'.join([_wrapline(line) for line in lines])
+
+
+def load(fileObject, cache=False, compact=False, registry=None):
+    """
+    Read airfoil tables from C81 formatted file
+    With cache enabled, tables are read from a binary sidecar file next to
+    the C81 file if it is still up to date and written to it otherwise.
+    Caching applies to files holding a single airfoil that are read from
+    their start, others are parsed. The file object is left after the table
+    in either case.
+    With compact enabled, tables use compact storage as in C81.compact.
+    If a TableRegistry is given, tables identical to registered ones are shared.
+    """
+    c81Data = _load(fileObject, cache)
+    if compact:
+        c81Data.compact()
+    if registry is not None:
+        registry.register(c81Data)
+    return c81Data
+
+
+def _load(fileObject, cache):
+    """ Read airfoil tables from C81 formatted file or its sidecar """
+    sidecar = _sidecarPath(fileObject) if cache else None
+    if sidecar is None:
+        return _loadText(fileObject)
+
+    stored = _sidecarSource(fileObject.name, sidecar)
+    if stored is not None and 'end' in stored:
+        c81Data = load_binary(sidecar)
+        # Leave the file object after the table as parsing would
+        fileObject.seek(stored['end'])
+        return c81Data
+
+    c81Data = _loadText(fileObject)
+    # Files holding several airfoils are always parsed
+    if _atEnd(fileObject):
+        stamp = _sourceStamp(fileObject.name)
+        stamp['end'] = fileObject.tell()
+        try:
+            _writeBinary(c81Data, sidecar, stamp)
+        except OSError:
+            pass
+    return c81Data
+
+
+def _sidecarPath(fileObject):
+    """ Returns path of binary sidecar or None if fileObject cannot use one """
+    filename = getattr(fileObject, 'name', None)
+    if not isinstance(filename, str) or not os.path.isfile(filename):
+        return None
+    try:
+        if fileObject.tell() != 0:
+            return None
+    except OSError:
+        # Position is unknown while the file is iterated over
+        return None
+    return filename + SIDECAR_SUFFIX
+
+
+def _atEnd(fileObject):
+    """ Checks if only whitespace remains in file object, keeping its position """
+    position = fileObject.tell()
+    try:
+        while True:
+            chunk = fileObject.read(4096)
+            if not chunk:
+                return True
+            if chunk.strip():
+                return False
+    finally:
+        fileObject.seek(position)
+
+
+def _loadText(fileObject):
+    """ Parses airfoil tables from C81 formatted text """
+    airfoilname, sizes = _parseHeader(fileObject.readline())
+    nmach_l, nalpha_L, nmach_d, nalpha_D, nmach_m, nalpha_M = sizes
+
+    # Read all lines of the three sections in one go
+    nlines_l = _sectionLines(nmach_l, nalpha_L)
+    nlines_d = _sectionLines(nmach_d, nalpha_D)
+    nlines_m = _sectionLines(nmach_m, nalpha_M)
+    # readline keeps tell and seek usable on the file object, unlike iteration
+    lines = [fileObject.readline() for i in range(nlines_l + nlines_d + nlines_m)]
+    if not lines[-1]:
+        raise ValueError('Unexpected end of file in ' + airfoilname.strip())
+
+    alpha_L, mach_l, CL = _parseSection(lines[:nlines_l],
+                                        nmach_l, nalpha_L, 'CL')
+    alpha_D, mach_d, CD = _parseSection(lines[nlines_l:nlines_l+nlines_d],
+                                        nmach_d, nalpha_D, 'CD')
+    alpha_M, mach_m, CM = _parseSection(lines[nlines_l+nlines_d:],
+                                        nmach_m, nalpha_M, 'CM')
 
     return C81(airfoilname, \
                 alpha_L, mach_l, CL, \
                 alpha_D, mach_d, CD, \
                 alpha_M, mach_m, CM)
+
+
+def _parseHeader(header):
+    """ Returns airfoil name and no. of mach and alpha values of CL, CD and CM sections """
+    header = header.rstrip()
+    sizes = tuple(int(header[indx:indx+2]) for indx in range(30, 42, 2))
+    return header[0:30], sizes
+
+
+def _sectionLines(nmach, nalpha):
+    """ Returns no. of lines in a section, including its mach line """
+    # Rows with more than 9 mach values are wrapped onto a second line
+    linesPerRow = 2 if nmach > 9 else 1
+    return linesPerRow * (nalpha + 1)
+
+
+def _parseSection(lines, nmach, nalpha, coeffname):
+    """ Parses lines of a section into alpha, mach and coefficient arrays """
+    linesPerRow = 2 if nmach > 9 else 1
+    mach = np.array(''.join(lines[:linesPerRow]).split(), dtype=float)
+    rows = np.array(''.join(lines[linesPerRow:]).split(), dtype=float)
+    if mach.size != nmach or rows.size != nalpha * (nmach + 1):
+        raise ValueError('Inconsistent no. of values in ' + coeffname + ' section')
+    rows = rows.reshape(nalpha, nmach + 1)
+    return rows[:, 0], mach, rows[:, 1:]
+
+
+def save_binary(c81Data, filename, source=None):
+    """
+    Write airfoil tables to a binary file that may be memory-mapped
+    The file holds a JSON header followed by little-endian float64 arrays.
+    If source is the path of the originating C81 file, its size, modification
+    time and content hash are stored to detect stale copies.
+    """
+    _writeBinary(c81Data, filename, None if source is None else _sourceStamp(source))
+
+
+def _writeBinary(c81Data, filename, stamp):
+    """ Writes binary file with a source stamp dict or None in its header """
+    arrays = _tableArrays(c81Data)
+    header = {'airfoilname': c81Data.airfoilname,
+              'source': stamp,
+              'arrays': [[name, start, list(arr.shape)] for name, start, arr in arrays]}
+    tmpname = filename + '.tmp' + str(os.getpid())
+    with open(tmpname, 'wb') as fh:
+        fh.write(_binaryHeader(header))
+        for name, start, arr in arrays:
+            fh.write(arr.tobytes())
+    os.replace(tmpname, filename)
+
+
+def _binaryHeader(header):
+    """ Returns magic, header length and JSON header dict as bytes preceding binary data """
+    headerBytes = json.dumps(header).encode('utf-8')
+    # Pad header so that the data is aligned to 8 bytes
+    headerBytes += b' ' * (-(len(_BINARY_MAGIC) + 8 + len(headerBytes)) % 8)
+    return _BINARY_MAGIC + np.array(len(headerBytes), dtype='<u8').tobytes() + headerBytes
+
+
+def load_binary(filename, mmap=False):
+    """
+    Read airfoil tables from a binary file written by save_binary
+    With mmap enabled, arrays are read-only views of the memory-mapped file
+    and processes loading the same file share its pages.
+    """
+    with open(filename, 'rb') as fh:
+        header, dataOffset = _readBinaryHeader(fh)
+        size = sum(int(np.prod(shape)) for name, start, shape in header['arrays'])
+        if mmap:
+            data = np.memmap(filename, dtype='<f8', mode='r', offset=dataOffset, shape=(size,))
+        else:
+            data = np.fromfile(fh, dtype='<f8', count=size)
+            if data.size != size:
+                raise ValueError('Unexpected end of file in ' + filename)
+
+    return _tablesFromArrays(header['airfoilname'], data, header['arrays'])
+
+
+def _tableArrays(c81Data, offset=0):
+    """
+    Returns list of name, offset and float64 array of each table array
+    Offsets are counted in elements from the given starting offset.
+    """
+    arrays = []
+    for coeffname in ('CL', 'CD', 'CM'):
+        table = getattr(c81Data, coeffname)
+        for field in ('alpha', 'mach', 'val'):
+            arr = np.ascontiguousarray(getattr(table, field), dtype='<f8')
+            arrays.append((coeffname + '_' + field, offset, arr))
+            offset += arr.size
+    return arrays
+
+
+def _tablesFromArrays(airfoilname, data, entries):
+    """ Creates C81 object from views of flat data described by name, offset and shape entries """
+    arrays = {name: data[start:start+int(np.prod(shape))].reshape(shape)
+              for name, start, shape in entries}
+    return C81._fromTables(airfoilname,
+                           *[CoeffTable(arrays[coeffname + '_alpha'],
+                                        arrays[coeffname + '_mach'],
+                                        arrays[coeffname + '_val'], coeffname)
+                             for coeffname in ('CL', 'CD', 'CM')])
+
+
+def _readBinaryHeader(fh):
+    """ Returns header dict and data offset of binary file """
+    if fh.read(len(_BINARY_MAGIC)) != _BINARY_MAGIC:
+        raise ValueError('Not a c81utils binary file: ' + getattr(fh, 'name', repr(fh)))
+    headerLength = int(np.frombuffer(fh.read(8), dtype='<u8')[0])
+    header = json.loads(fh.read(headerLength).decode('utf-8'))
+    return header, len(_BINARY_MAGIC) + 8 + headerLength
+
+
+def _sourceStamp(filename, withHash=True):
+    """ Returns size, modification time and optionally hash of file """
+    stat = os.stat(filename)
+    stamp = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if withHash:
+        with open(filename, 'rb') as fh:
+            stamp['sha1'] = hashlib.sha1(fh.read()).hexdigest()
+    return stamp
+
+
+def _sidecarIsFresh(filename, sidecar):
+    """ Checks if sidecar was written from the current contents of filename """
+    return _sidecarSource(filename, sidecar) is not None
+
+
+def _sidecarSource(filename, sidecar):
+    """ Returns source stamp stored in sidecar if it matches filename, else None """
+    try:
+        with open(sidecar, 'rb') as fh:
+            stored = _readBinaryHeader(fh)[0]['source']
+    except (OSError, ValueError):
+        return None
+    if stored is None:
+        return None
+    stamp = _sourceStamp(filename, withHash=False)
+    if stamp['size'] != stored['size']:
+        return None
+    if stamp['mtime_ns'] == stored['mtime_ns']:
+        return stored
+    # Touched but possibly unchanged file
+    return stored if _sourceStamp(filename)['sha1'] == stored['sha1'] else None
+
+
+class SharedTables:
+    """
+    Airfoil tables published in a shared memory block for worker processes
+    The block holds a JSON header followed by float64 arrays, as in
+    save_binary. Airfoils are looked up by key and returned as C81 objects
+    whose arrays are read-only views of the block, so processes share one
+    copy of the data and skip parsing. Interpolation data is still built
+    lazily in each process on first lookup.
+    Pickling only passes the block name and unpickling attaches to it, so
+    objects may be handed to worker processes as task arguments.
+    """
+
+    def __init__(self, shm, owner):
+        self._shm = shm
+        self._owner = owner
+        # Forked workers inherit this object and must attach anew, see attach
+        self._pid = os.getpid()
+        self._airfoils = {}
+        header, dataOffset = _readBinaryHeader(io.BytesIO(shm.buf[:_headerLimit(shm)]))
+        self._entries = OrderedDict((key, (airfoilname, arrays))
+                                    for key, airfoilname, arrays in header['airfoils'])
+        size = sum(int(np.prod(shape)) for airfoilname, arrays in self._entries.values()
+                   for name, start, shape in arrays)
+        self._data = np.ndarray((size,), dtype='<f8', buffer=shm.buf, offset=dataOffset)
+        self._data.flags.writeable = False
+        # Views of the tables have this array as their base, so the block
+        # stays mapped until the last of them is garbage collected
+        finalizer = weakref.finalize(self._data, shm.close)
+        finalizer.atexit = False
+
+    @classmethod
+    def publish(cls, airfoils, name=None):
+        """
+        Copies airfoil tables into a new shared memory block
+        airfoils may be a dict of C81 objects or a list of them, keyed by
+        airfoilname. The publishing process owns the block and should call
+        unlink once workers are done with it.
+        """
+        if not isinstance(airfoils, dict):
+            airfoils = OrderedDict((c81Data.airfoilname, c81Data) for c81Data in airfoils)
+
+        entries = []
+        arrays = []
+        offset = 0
+        for key, c81Data in airfoils.items():
+            tableArrays = _tableArrays(c81Data, offset)
+            entries.append([key, c81Data.airfoilname,
+                            [[arrayname, start, list(arr.shape)]
+                             for arrayname, start, arr in tableArrays]])
+            arrays.extend(tableArrays)
+            offset += sum(arr.size for arrayname, start, arr in tableArrays)
+
+        headerBytes = _binaryHeader({'airfoils': entries})
+        dataOffset = len(headerBytes)
+
+        # Imported here as shared memory needs Python 3.8
+        from multiprocessing import shared_memory
+        shm = shared_memory.SharedMemory(name=name, create=True,
+                                         size=max(dataOffset + 8 * offset, 1))
+        shm.buf[:dataOffset] = headerBytes
+        data = np.ndarray((offset,), dtype='<f8', buffer=shm.buf, offset=dataOffset)
+        for arrayname, start, arr in arrays:
+            data[start:start+arr.size] = arr.reshape(-1)
+        del data
+        shared = cls(shm, owner=True)
+        _sharedTables[shm.name] = shared
+        return shared
+
+    @classmethod
+    def attach(cls, name):
+        """
+        Attaches to tables published under name by another process
+        Repeated calls in a process return the same object while it is alive.
+        """
+        shared = _sharedTables.get(name)
+        if shared is None or shared._pid != os.getpid():
+            shared = cls(_attachSharedMemory(name), owner=False)
+            _sharedTables[name] = shared
+        return shared
+
+    @property
+    def name(self):
+        """ Returns name of the shared memory block """
+        return self._shm.name
+
+    @property
+    def nbytes(self):
+        """ Returns size of the shared memory block in bytes """
+        return self._shm.size
+
+    def __reduce__(self):
+        return (SharedTables.attach, (self.name,))
+
+    def __repr__(self):
+        return 'SharedTables(' + repr(self.name) + ', ' + str(len(self)) + ' airfoils)'
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def keys(self):
+        """ Returns keys of published airfoils """
+        return self._entries.keys()
+
+    def __getitem__(self, key):
+        """ Returns C81 object viewing the shared tables of airfoil key """
+        c81Data = self._airfoils.get(key)
+        if c81Data is None:
+            if self._data is None:
+                raise ValueError('SharedTables ' + self.name + ' is closed')
+            airfoilname, arrays = self._entries[key]
+            c81Data = _tablesFromArrays(airfoilname, self._data, arrays)
+            self._airfoils[key] = c81Data
+        return c81Data
+
+    def close(self):
+        """
+        Detaches this process from the shared memory block
+        C81 objects returned earlier remain usable, the block is unmapped
+        once they are garbage collected.
+        """
+        self._airfoils.clear()
+        self._data = None
+        if _sharedTables.get(self.name) is self:
+            del _sharedTables[self.name]
+
+    def unlink(self):
+        """
+        Closes and frees the shared memory block, in the publishing process
+        Processes still viewing the block keep its memory until they close it.
+        """
+        if not self._owner or self._pid != os.getpid():
+            raise ValueError('Only the publishing process may unlink ' + self.name)
+        self.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self._owner and self._pid == os.getpid():
+            self.unlink()
+        else:
+            self.close()
+
+
+# Tables attached in this process, keyed by shared memory block name
+_sharedTables = weakref.WeakValueDictionary()
+
+# Process that started its own resource tracker when attaching to a block
+_privateTrackerPid = None
+
+
+def _headerLimit(shm):
+    """ Returns no. of bytes of shared memory block holding its header """
+    headerLength = int(np.frombuffer(shm.buf[len(_BINARY_MAGIC):len(_BINARY_MAGIC)+8],
+                                     dtype='<u8')[0])
+    return len(_BINARY_MAGIC) + 8 + headerLength
+
+
+def _attachSharedMemory(name):
+    """ Attaches to existing shared memory block without tracking it for cleanup """
+    global _privateTrackerPid
+    from multiprocessing import shared_memory
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Before Python 3.13, attaching registers the block with the resource
+    # tracker, which unlinks it when the tracker's processes exit. Child
+    # processes share the tracker of their parent and must leave its record
+    # of the block in place, only a tracker started here for attaching is told
+    # to forget the block.
+    if os.name != 'posix':
+        return shared_memory.SharedMemory(name=name)
+    from multiprocessing import resource_tracker
+    if getattr(resource_tracker._resource_tracker, '_fd', None) is None:
+        _privateTrackerPid = os.getpid()
+    shm = shared_memory.SharedMemory(name=name)
+    if _privateTrackerPid == os.getpid():
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+
+def loadXfoil(fileObject, mach=(0.0, 0.5, 1.0)):
+    """
+    Read an XFOIL polar file as airfoil tables
+    The polar is replicated over the given mach values.
+    """
+    airfoilname = ''
+    for line in fileObject:
+        if 'polar for:' in line:
+            airfoilname = line.split(':', 1)[1].strip()
+        elif line.lstrip().startswith('---'):
+            break
+    else:
+        raise ValueError('No polar data found')
+
+    # Columns are alpha, CL, CD, CDp, CM, ...
+    rows = []
+    for line in fileObject:
+        cols = line.split()
+        if not cols:
+            break
+        rows.append(cols[:5])
+    if not rows:
+        raise ValueError('No polar data found')
+    rows = np.array(rows, dtype=float)
+
+    alpha = rows[:, 0]
+    mach = np.array(mach, dtype=float)
+    CL = np.tile(rows[:, 1], (mach.size, 1)).T
+    CD = np.tile(rows[:, 2], (mach.size, 1)).T
+    CM = np.tile(rows[:, 4], (mach.size, 1)).T
+    return C81(airfoilname, \
+               alpha, mach, CL, \
+               alpha, mach, CD, \
+               alpha, mach, CM)
+
+
+def convertXfoil(patterns, mach=(0.0, 0.5, 1.0), outdir=None, processes=None):
+    """
+    Convert XFOIL polar files to C81 files in parallel
+    patterns may be file names, glob patterns or directories, from which all
+    .dat files are taken. Each file is written next to its source with a .C81
+    suffix added, or into outdir if given. Files are spread over processes
+    worker processes, defaulting to the no. of CPUs.
+    Returns a list of dicts with the source, output, time taken in seconds and
+    error message or None for each file
+    """
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    jobs = [(filename, tuple(mach), outdir) for filename in _findFiles(patterns, '.dat')]
+    if processes == 1 or len(jobs) < 2:
+        return list(map(_convertXfoilFile, jobs))
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(_convertXfoilFile, jobs, chunksize=8))
+
+
+def _convertXfoilFile(job):
+    """ Converts a single XFOIL polar file and returns its report """
+    filename, mach, outdir = job
+    if outdir is None:
+        output = filename + '.C81'
+    else:
+        output = os.path.join(outdir, os.path.basename(filename) + '.C81')
+
+    report = {'source': filename, 'output': output, 'seconds': 0.0, 'error': None}
+    start = time.perf_counter()
+    try:
+        with open(filename, 'r') as fh:
+            c81Data = loadXfoil(fh, mach)
+        with open(output, 'w') as fh:
+            dump(c81Data, fh)
+    except (OSError, ValueError) as err:
+        report['error'] = str(err)
+    report['seconds'] = time.perf_counter() - start
+    return report
+
+
+def validate(patterns, limits=None, processes=None):
+    """
+    Check C81 files without building interpolating functions
+    patterns may be file names, glob patterns or directories, from which all
+    .C81 files are taken. Files are checked by validateFile, spread over
+    processes worker processes, defaulting to the no. of CPUs.
+    Returns a dict that can be written as JSON with the no. of files, errors
+    and warnings, and a report per file holding its source, time taken in
+    seconds, whether it is valid and its list of issues
+    """
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    jobs = [(filename, limits) for filename in _findFiles(patterns)]
+    if processes == 1 or len(jobs) < 2:
+        reports = list(map(_validateJob, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            reports = list(executor.map(_validateJob, jobs, chunksize=8))
+
+    levels = [issue['level'] for report in reports for issue in report['issues']]
+    return {'nfiles': len(reports), 'nerrors': levels.count('error'),
+            'nwarnings': levels.count('warning'), 'files': reports}
+
+
+def _validateJob(job):
+    """ Validates a single file and returns its report """
+    filename, limits = job
+    report = {'source': filename, 'seconds': 0.0, 'valid': False, 'issues': []}
+    start = time.perf_counter()
+    try:
+        with open(filename, 'r') as fh:
+            report['issues'] = validateFile(fh, limits)
+    except (OSError, UnicodeDecodeError) as err:
+        report['issues'] = [_issue(None, None, None, str(err))]
+    report['valid'] = all(issue['level'] != 'error' for issue in report['issues'])
+    report['seconds'] = time.perf_counter() - start
+    return report
+
+
+def validateFile(fileObject, limits=None):
+    """
+    Check C81 formatted text of one or more airfoils line by line
+    Header counts, wrapping of rows, numbers, non-finite values and strictly
+    increasing alpha and mach values are errors. Values outside the ranges in
+    limits, which default to VALUE_LIMITS, are warnings. After an error in the
+    layout of a file, lines cannot be matched to sections, so checking skips
+    to the next line that looks like an airfoil header.
+    Returns list of dicts with the line number, airfoil name, section, level
+    and message of each issue
+    """
+    limits = dict(VALUE_LIMITS, **(limits or {}))
+    issues = []
+    lines = _NumberedLines(fileObject)
+    resync = False
+    found = False
+    for lineno, header in lines:
+        if not header.strip() or (resync and not _isHeader(header)):
+            continue
+        found = True
+        resync = not _validateAirfoil(lineno, header, lines, limits, issues)
+    if not found:
+        issues.append(_issue(1, None, None, 'No airfoil header found'))
+    issues.sort(key=lambda issue: issue['line'])
+    return issues
+
+
+class _NumberedLines:
+    """ Iterator over numbered lines of a file to which lines may be put back """
+
+    def __init__(self, fileObject):
+        self._lines = enumerate(fileObject, 1)
+        self._held = []
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return self._held.pop() if self._held else next(self._lines)
+
+    def putBack(self, numberedLines):
+        """ Puts back lineno and text pairs to be read again in order """
+        self._held.extend(reversed(numberedLines))
+
+
+def _isHeader(line):
+    """ Checks if line looks like an airfoil header line """
+    try:
+        _parseHeader(line)
+    except ValueError:
+        return False
+    return True
+
+
+def _issue(lineno, airfoilname, coeffname, message, level='error'):
+    """ Returns dict describing an issue found by validateFile """
+    return {'line': lineno, 'airfoil': airfoilname, 'section': coeffname,
+            'level': level, 'message': message}
+
+
+def _issueRecorder(issues, airfoilname, coeffname):
+    """ Returns function appending issues in a section to the list of issues """
+    def issue(lineno, message, level='error'):
+        issues.append(_issue(lineno, airfoilname, coeffname, message, level))
+    return issue
+
+
+def _validateAirfoil(lineno, header, lines, limits, issues):
+    """ Checks an airfoil from its header line and returns False if its layout is broken """
+    airfoilname = header[0:30].strip()
+    try:
+        airfoilname, sizes = _parseHeader(header)
+    except ValueError:
+        issues.append(_issue(lineno, airfoilname, None,
+                             'Invalid header, expected six 2 digit counts in columns 31-42'))
+        return False
+    airfoilname = airfoilname.strip()
+
+    for indx, coeffname in enumerate(('CL', 'CD', 'CM')):
+        nmach, nalpha = sizes[2*indx], sizes[2*indx+1]
+        # Lines of a section with negative counts cannot be told apart
+        if nmach < 0 or nalpha < 0:
+            issues.append(_issue(lineno, airfoilname, coeffname,
+                                 'Negative no. of mach or alpha values in header'))
+            return False
+        if nmach < 2 or nalpha < 2:
+            issues.append(_issue(lineno, airfoilname, coeffname,
+                                 'Atleast two mach and alpha values required'))
+        issue = _issueRecorder(issues, airfoilname, coeffname)
+        if not _validateSection(lineno, nmach, nalpha, lines, limits[coeffname], limits, issue):
+            return False
+        lineno += _sectionLines(nmach, nalpha)
+    return True
+
+
+def _validateSection(lineno, nmach, nalpha, lines, valueLimits, limits, issue):
+    """ Checks a section following line lineno and returns False if its layout is broken """
+    rows = _readSectionRows(lineno, nmach, nalpha, lines, issue)
+    if rows is None:
+        return False
+
+    # Rows with a wrong no. of values or invalid numbers are left out
+    if rows and rows[0] is not None:
+        _validateValues(rows[0][0], 'mach', rows[0][1], limits['mach'], issue)
+    previous = None
+    for lineno, values in filter(None, rows[1:]):
+        _validateValues(lineno, 'alpha', values[:1], limits['alpha'], issue)
+        _validateValues(lineno, 'coefficient', values[1:], valueLimits, issue)
+        if previous is not None and not values[0] > previous:
+            issue(lineno, 'alpha should be strictly increasing, found ' + str(values[0]) +
+                  ' after ' + str(previous))
+        previous = values[0]
+    return True
+
+
+def _readSectionRows(lineno, nmach, nalpha, lines, issue):
+    """
+    Reads mach line and alpha rows of a section following line lineno
+    Returns list of line number and values of each row, or None in place of
+    rows with issues, or returns None if the layout of the section is broken
+    """
+    # Rows with more than 9 mach values are wrapped onto a second line
+    linesPerRow = 2 if nmach > 9 else 1
+    machCounts = [min(nmach, 9), nmach - 9][:linesPerRow]
+    rowCounts = [machCounts[0] + 1] + machCounts[1:]
+
+    rows = []
+    for row in range(nalpha + 1):
+        rowLines = list(islice(lines, linesPerRow))
+        if len(rowLines) < linesPerRow:
+            issue(lineno + len(rowLines) + 1, 'Unexpected end of file, found ' +
+                  str(max(row - 1, 0)) + ' of ' + str(nalpha) + ' alpha rows')
+            return None
+        if not _checkRowLayout(row, nalpha, rowLines, lines, issue):
+            return None
+        lineno = rowLines[-1][0]
+        values = _readRowValues(rowLines, machCounts if row == 0 else rowCounts, issue)
+        if values is None or len(values) != (nmach if row == 0 else nmach + 1):
+            rows.append(None)
+        else:
+            rows.append((rowLines[0][0], values))
+    return rows
+
+
+def _checkRowLayout(row, nalpha, rowLines, lines, issue):
+    """
+    Checks if lines of a row, the mach line for row 0, are where expected
+    Lines from an unexpected airfoil header on are put back to be read again.
+    """
+    expected = 'mach values' if row == 0 else 'alpha row ' + str(row) + ' of ' + str(nalpha)
+    for indx, (lineno, text) in enumerate(rowLines):
+        if _isHeader(text):
+            issue(lineno, 'Unexpected airfoil header, expected ' + expected)
+            lines.putBack(rowLines[indx:])
+            return False
+
+    lineno, text = rowLines[0]
+    if row == 0 and text[:7].strip():
+        issue(lineno, 'Expected mach values with blank alpha field, '
+              'header counts of the previous section may be too small')
+        return False
+    if row > 0 and not text[:7].strip():
+        issue(lineno, 'Expected ' + expected + ', header count of alpha values may be too large')
+        return False
+    return True
+
+
+def _readRowValues(rowLines, counts, issue):
+    """ Returns values on lines of a row, or None if there is an invalid number """
+    values = []
+    for (lineno, text), expected in zip(rowLines, counts):
+        fields = text.split()
+        if len(fields) != expected:
+            issue(lineno, 'Expected ' + str(expected) + ' values, found ' + str(len(fields)))
+        try:
+            values.extend(float(field) for field in fields)
+        except ValueError:
+            issue(lineno, 'Invalid number in ' + repr(text.strip()))
+            return None
+    return values
+
+
+def _validateValues(lineno, name, values, valueLimits, issue):
+    """ Checks values on a line for non-finite values, ordering of mach values and range """
+    values = np.array(values)
+    if not np.isfinite(values).all():
+        issue(lineno, 'Non-finite ' + name + ' values')
+        return
+    if name == 'mach' and not _isIncreasing(values):
+        issue(lineno, 'mach should be strictly increasing')
+    outside = values[(values < valueLimits[0]) | (values > valueLimits[1])]
+    if outside.size:
+        issue(lineno, str(outside.size) + ' ' + name + ' values outside ' +
+              str(list(valueLimits)) + ', e.g. ' + str(outside[0]), level='warning')
@@ -1,47 +1,29 @@
-""" Reads XFOIL polar file and writes to C81 format """
-""" The mach number is replicated over three columns """
+""" Reads XFOIL polar files and writes them to C81 format """
+""" The polar is replicated over the given mach values """
 import c81utils
-import sys
-import numpy as np
+import argparse
 
 def main():
-    xfoilFilename = sys.argv[-1]
-
-    with open(xfoilFilename, 'r') as fh:
-        lines = fh.readlines()[2:-2]
-
-    airfoilName = lines[0].split(':')[1].strip()
-    lines = lines[9:]
-
-    # Extract data values
-    alpha = []
-    CL = []
-    CD = []
-    CM = []
-    for line in lines:
-        cols = line.split()
-        alpha.append(float(cols[0]))
-        CL.append(float(cols[1]))
-        CD.append(float(cols[2]))
-        CM.append(float(cols[4]))
-
-    alpha = np.array(alpha)
-    CL = np.array(CL)
-    CD = np.array(CD)
-    CM = np.array(CM)
-
-    mach = np.array([0.0, 0.5, 1.0])
-    # Convert CL, CD, CM to 2d arrays
-    CL = np.tile(CL, (mach.size,1)).T
-    CD = np.tile(CD, (mach.size,1)).T
-    CM = np.tile(CM, (mach.size,1)).T
-
-    c81Airfoil = c81utils.C81(airfoilName, \
-                             alpha, mach, CL, \
-                             alpha, mach, CD, \
-                             alpha, mach, CM)
-    with open(xfoilFilename + '.C81', 'w') as fh:
-        c81utils.dump(c81Airfoil, fh)
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('patterns', nargs='+',
+                        help='XFOIL polar files, glob patterns or directories')
+    parser.add_argument('--mach', type=float, nargs='+', default=[0.0, 0.5, 1.0],
+                        help='mach values for the C81 tables')
+    parser.add_argument('--outdir', help='directory for C81 files')
+    parser.add_argument('--processes', type=int,
+                        help='no. of worker processes')
+    args = parser.parse_args()
+
+    reports = c81utils.convertXfoil(args.patterns, mach=args.mach,
+                                    outdir=args.outdir, processes=args.processes)
+    nfailed = 0
+    for report in reports:
+        if report['error'] is None:
+            print('{:8.3f} s  {}'.format(report['seconds'], report['output']))
+        else:
+            nfailed += 1
+            print('  FAILED  {}: {}'.format(report['source'], report['error']))
+    print('Converted {} of {} files'.format(len(reports) - nfailed, len(reports)))
 
 
 if __name__ == '__main__':
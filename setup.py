@@ -25,6 +25,7 @@ setup(name='c81utils',
       include_package_data=True,
       zip_safe=True,
       install_requires=['numpy', 'scipy'],
+      extras_require={'jit': ['numba']},
       py_modules=['c81utils'],
       test_suite='test_c81utils.main',
      )
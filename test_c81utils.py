@@ -2,7 +2,15 @@ import unittest
 import c81utils
 import numpy as np
 import csv
+from concurrent.futures import ProcessPoolExecutor
 import filecmp, os
+import io
+import json
+import pickle
+import shutil
+import subprocess
+import sys
+import tempfile
 
 testdir = 'tests/'
 
@@ -124,6 +132,34 @@ class C81FileTestGood(unittest.TestCase):
         self.assertTrue(self.npl == self.npl2)
 
 
+class C81FileTestMultiple(unittest.TestCase):
+
+    def setUp(self):
+        with open(testdir + 'sample1.C81') as f:
+            self.text1 = f.read()
+        with open(testdir + 'sample2.C81') as f:
+            self.text2 = f.read()
+
+    def test_consecutiveTables(self):
+        fh = io.StringIO(self.text1 + self.text2)
+        npl = c81utils.load(fh)
+        vr8 = c81utils.load(fh)
+        self.assertEqual(npl.airfoilname.strip(), 'NPL_9615 AIRFOIL (7 Aug 1990)')
+        self.assertEqual(vr8.airfoilname.strip(), 'VR8TM6 VR8 -6 tab C81 format')
+        self.assertEqual(fh.read(), '')
+
+    def test_tell(self):
+        with open(testdir + 'sample1.C81') as fh:
+            c81utils.load(fh)
+            self.assertEqual(fh.tell(), os.path.getsize(testdir + 'sample1.C81'))
+            fh.seek(0)
+            self.assertEqual(c81utils.load(fh).airfoilname.strip(), 'NPL_9615 AIRFOIL (7 Aug 1990)')
+
+    def test_truncated(self):
+        lines = self.text1.splitlines(True)
+        self.assertRaises(ValueError, c81utils.load, io.StringIO(''.join(lines[:-3])))
+
+
 class C81InputTestGood(unittest.TestCase):
 
     def setUp(self):
@@ -180,6 +216,13 @@ class C81InputTestGood(unittest.TestCase):
         self.assertAlmostEqual(CD, 0.15, places=12)
         self.assertAlmostEqual(CM, 0.15, places=12)
 
+    def test_nan(self):
+        nan = float('nan')
+        self.assertTrue(np.isnan(self.airfoil.getCL(nan, 0.5)))
+        self.assertTrue(np.isnan(self.airfoil.getCD(2, nan)))
+        self.assertTrue(np.isnan(self.airfoil.getCoeffs(nan, nan)).all())
+        self.assertTrue(np.isnan(self.airfoil.getCMArray([nan], [0.5])).all())
+
     def test_arrayCoeffs(self):
         alphas = [2, 2, 8, 16, -1, 1]
         machs = [0.5, 0.0, 1.5, 0.5, 0.5, 0.25]
@@ -194,6 +237,627 @@ class C81InputTestGood(unittest.TestCase):
         for indx, val in enumerate(CM):
             self.assertAlmostEqual(val, correct[indx], places=12)
 
+    def test_batchCoeffs(self):
+        alphas = np.array([2, 2, 8, 16, -1, 1])
+        machs = np.array([0.5, 0.0, 1.5, 0.5, 0.5, 0.25])
+        correct = [0.3, 0.2, 1.0, 1.1, 0.1, 0.15]
+        for getArray in (self.airfoil.getCLArray, self.airfoil.getCDArray, self.airfoil.getCMArray):
+            vals = getArray(alphas, machs)
+            self.assertEqual(vals.shape, alphas.shape)
+            np.testing.assert_allclose(vals, correct, rtol=0, atol=1e-12)
+
+        # Broadcasting over a grid of query points
+        vals = self.airfoil.getCLArray(alphas[:, np.newaxis], machs[np.newaxis, :])
+        self.assertEqual(vals.shape, (6, 6))
+        self.assertAlmostEqual(vals[5, 5], self.airfoil.getCL(1, 0.25), places=12)
+
+    def test_gradient(self):
+        # CL = 0.1*alpha + 0.2*mach on this table
+        CL, dAlpha, dMach = self.airfoil.getCLGradient([1, 5, 9, 12, -1, 5], [0.25, 0.75, 0.5, 0.5, 0.5, 2])
+        np.testing.assert_allclose(CL, [0.15, 0.65, 1.0, 1.1, 0.1, 0.7], atol=1e-12)
+        np.testing.assert_allclose(dAlpha, [0.1, 0.1, 0.1, 0.0, 0.0, 0.1], atol=1e-12)
+        np.testing.assert_allclose(dMach, [0.2, 0.2, 0.2, 0.2, 0.2, 0.0], atol=1e-12)
+
+    def test_fusedCoeffs(self):
+        self.assertEqual(self.airfoil._gridSharing(), (True, True))
+        CL, CD, CM = self.airfoil.getCoeffs(1, 0.25)
+        self.assertAlmostEqual(CL, 0.15, places=12)
+        self.assertAlmostEqual(CD, 0.15, places=12)
+        self.assertAlmostEqual(CM, 0.15, places=12)
+
+
+class C81SplineComparisonTest(unittest.TestCase):
+
+    def setUp(self):
+        with open(testdir + 'sample1.C81') as f:
+            self.npl = c81utils.load(f)
+        rng = np.random.default_rng(81)
+        self.alphas = rng.uniform(-200, 200, 500)
+        self.machs = rng.uniform(-0.1, 1.0, 500)
+
+    def test_batchMatchesSpline(self):
+        for coeff in ('CL', 'CD', 'CM'):
+            spline = getattr(self.npl, '_interp' + coeff)
+            getArray = getattr(self.npl, 'get' + coeff + 'Array')
+            np.testing.assert_allclose(getArray(self.alphas, self.machs),
+                                       spline.ev(self.alphas, self.machs),
+                                       rtol=0, atol=1e-12)
+
+    def test_scalarMatchesSpline(self):
+        for coeff in ('CL', 'CD', 'CM'):
+            spline = getattr(self.npl, '_interp' + coeff)
+            getScalar = getattr(self.npl, 'get' + coeff)
+            getArray = getattr(self.npl, 'get' + coeff + 'Array')
+            vals = list(map(getScalar, self.alphas, self.machs))
+            self.assertIsInstance(vals[0], float)
+            np.testing.assert_allclose(vals, spline.ev(self.alphas, self.machs),
+                                       rtol=0, atol=1e-12)
+            # Scalar and batched paths use the same arithmetic
+            np.testing.assert_array_equal(vals, getArray(self.alphas, self.machs))
+
+        # Queries exactly on the table edges
+        table = self.npl.CL
+        self.assertEqual(self.npl.getCL(table.alpha[-1], table.mach[-1]), table.val[-1, -1])
+        self.assertEqual(self.npl.getCL(table.alpha[0], table.mach[0]), table.val[0, 0])
+
+    def test_fusedCoeffs(self):
+        CL, CD, CM = self.npl.getCoeffsArray(self.alphas, self.machs)
+        np.testing.assert_array_equal(CL, self.npl.getCLArray(self.alphas, self.machs))
+        np.testing.assert_array_equal(CD, self.npl.getCDArray(self.alphas, self.machs))
+        np.testing.assert_array_equal(CM, self.npl.getCMArray(self.alphas, self.machs))
+
+        CL, CD, CM = self.npl.getCoeffs(self.alphas[0], self.machs[0])
+        self.assertAlmostEqual(CL, self.npl.getCL(self.alphas[0], self.machs[0]), places=12)
+        self.assertAlmostEqual(CD, self.npl.getCD(self.alphas[0], self.machs[0]), places=12)
+        self.assertAlmostEqual(CM, self.npl.getCM(self.alphas[0], self.machs[0]), places=12)
+
+
+class C81LazyTest(unittest.TestCase):
+
+    def setUp(self):
+        with open(testdir + 'sample1.C81') as f:
+            self.npl = c81utils.load(f)
+
+    def test_lazyBuild(self):
+        self.assertFalse(self.npl.CL.isBuilt)
+        self.npl.getCL(2.0, 0.3)
+        self.assertTrue(self.npl.CL.isBuilt)
+        self.assertFalse(self.npl.CD.isBuilt)
+        self.assertFalse(self.npl.CM.isBuilt)
+        self.assertIsNone(self.npl.CL._spline)
+
+    def test_dirtyTracking(self):
+        self.npl.getCoeffs(2.0, 0.3)
+        self.npl.CD.val = self.npl.CD.val + 1.0
+        self.assertTrue(self.npl.CL.isBuilt)
+        self.assertFalse(self.npl.CD.isBuilt)
+        self.assertTrue(self.npl.CM.isBuilt)
+        self.assertAlmostEqual(self.npl.getCD(2.0, 0.3),
+                               self.npl._interpCD(2.0, 0.3)[0][0], places=12)
+
+        # In place edits are picked up after markDirty
+        self.npl.CL.val[:, :] = 0.5
+        self.npl.CL.markDirty()
+        self.assertEqual(self.npl.getCL(2.0, 0.3), 0.5)
+
+    def test_increasingCheck(self):
+        self.npl.CM.alpha = self.npl.CM.alpha[::-1].copy()
+        self.npl.getCL(2.0, 0.3)
+        self.assertRaises(ValueError, self.npl.getCM, 2.0, 0.3)
+        self.assertRaises(ValueError, self.npl.refreshInterpolation)
+
+
+class C81StatsTest(unittest.TestCase):
+
+    def setUp(self):
+        with open(testdir + 'sample1.C81') as f:
+            self.npl = c81utils.load(f)
+
+    def test_disabled(self):
+        self.assertIsNone(self.npl.stats())
+        self.assertNotIn('getCL', self.npl.__dict__)
+
+    def test_counts(self):
+        self.npl.enableStats()
+        self.npl.getCL(2.0, 0.3)
+        self.npl.getCL(200.0, 0.3)
+        self.npl.getCDArray([0.0, 1.0, 2.0], [0.3, 0.9, -0.1])
+        self.npl.getCoeffsArray(np.zeros((2, 5)), 0.5)
+        stats = self.npl.stats()
+        self.assertEqual(stats['CL']['queries'], 12)
+        self.assertEqual(stats['CL']['alphaOutOfRange'], 1)
+        self.assertEqual(stats['CL']['machOutOfRange'], 0)
+        self.assertEqual(stats['CD']['queries'], 13)
+        self.assertEqual(stats['CD']['machOutOfRange'], 2)
+        self.assertEqual(stats['CM']['queries'], 10)
+        self.assertGreater(stats['CL']['seconds'], 0.0)
+
+        self.npl.resetStats()
+        self.assertEqual(self.npl.stats()['CL']['queries'], 0)
+        self.npl.disableStats()
+        self.assertIsNone(self.npl.stats())
+        self.assertNotIn('getCL', self.npl.__dict__)
+
+    def test_allLookups(self):
+        self.npl.enableStats()
+        self.npl.evaluateCoeffs([0.0, 1.0], 0.3, out=(np.empty(2), np.empty(2), np.empty(2)))
+        self.npl.getCLGradient(2.0, 0.3)
+        self.npl.getCoeffsGradient([0.0, 1.0, 2.0], 0.3)
+        stats = self.npl.stats()
+        self.assertEqual(stats['CL']['queries'], 6)
+        self.assertEqual(stats['CD']['queries'], 5)
+
+    def test_pickle(self):
+        self.npl.enableStats()
+        npl = pickle.loads(pickle.dumps(self.npl))
+        self.assertEqual(npl.getCL(2.0, 0.3), self.npl.getCL(2.0, 0.3))
+        self.assertEqual(npl.stats()['CL']['queries'], 1)
+
+
+class C81CacheTest(unittest.TestCase):
+
+    def setUp(self):
+        with open(testdir + 'sample1.C81') as f:
+            self.npl = c81utils.load(f)
+        rng = np.random.default_rng(14)
+        self.alphas = np.round(rng.uniform(-20, 20, 300), 2)
+        self.machs = np.round(rng.uniform(0.0, 0.8, 300), 2)
+
+    def test_scalar(self):
+        expected = self.npl.getCoeffs(3.25, 0.45)
+        self.npl.enableCache(tolerance=0.01)
+        self.assertEqual(self.npl.getCoeffs(3.25, 0.45), expected)
+        self.assertEqual(self.npl.getCoeffs(3.25, 0.45), expected)
+        self.assertEqual(self.npl.getCL(3.25, 0.45), expected[0])
+        self.assertEqual(self.npl.cacheInfo()['hits'], 1)
+        self.assertEqual(self.npl.cacheInfo()['misses'], 2)
+
+        # Nearby queries share an entry
+        self.assertEqual(self.npl.getCL(3.251, 0.4501), expected[0])
+        self.assertEqual(self.npl.cacheInfo()['hits'], 2)
+
+    def test_batchedUncached(self):
+        expected = self.npl.getCoeffsArray(self.alphas, self.machs)
+        gradient = self.npl.getCLGradient(self.alphas, self.machs)
+        self.npl.enableCache(tolerance=0.01)
+        for val, expectedVal in zip(self.npl.getCoeffsArray(self.alphas, self.machs), expected):
+            np.testing.assert_array_equal(val, expectedVal)
+        out = tuple(np.empty(self.alphas.shape) for i in range(3))
+        self.assertIs(self.npl.evaluateCoeffs(self.alphas, self.machs, out=out), out)
+        for val, expectedVal in zip(self.npl.getCLGradient(self.alphas, self.machs), gradient):
+            np.testing.assert_array_equal(val, expectedVal)
+        self.assertEqual(self.npl.cacheInfo()['misses'], 0)
+
+    def test_nonFinite(self):
+        alphas = [np.nan, 1e300, -np.inf, 3.25]
+        expected = self.npl.getCLArray(alphas, 0.45)
+        self.npl.enableCache(tolerance=0.01)
+        for alpha, expectedVal in zip(alphas, expected):
+            np.testing.assert_array_equal(self.npl.getCL(alpha, 0.45), expectedVal)
+        self.assertEqual(self.npl.cacheInfo()['size'], 1)
+
+    def test_bounded(self):
+        self.npl.enableCache(maxsize=10, tolerance=0.01)
+        for alpha, mach in zip(self.alphas, self.machs):
+            self.npl.getCL(alpha, mach)
+        self.assertEqual(self.npl.cacheInfo()['size'], 10)
+
+        # The least recently used point is dropped
+        self.npl.getCL(self.alphas[-10], self.machs[-10])
+        self.npl.getCL(1.0, 0.3)
+        misses = self.npl.cacheInfo()['misses']
+        self.npl.getCL(self.alphas[-10], self.machs[-10])
+        self.npl.getCL(self.alphas[-9], self.machs[-9])
+        self.assertEqual(self.npl.cacheInfo()['misses'], misses + 1)
+
+    def test_invalidation(self):
+        self.npl.enableCache()
+        self.npl.enableStats()
+        self.npl.getCL(2.0, 0.3)
+        self.npl.refreshInterpolation()
+        self.assertEqual(self.npl.cacheInfo()['size'], 0)
+        self.npl.getCL(2.0, 0.3)
+        self.npl.CL.val = self.npl.CL.val + 1.0
+        self.assertAlmostEqual(self.npl.getCL(2.0, 0.3), self.npl.CL.interpolateScalar(2.0, 0.3))
+        self.assertEqual(self.npl.cacheInfo()['misses'], 3)
+        self.assertEqual(self.npl.stats()['CL']['queries'], 3)
+
+        self.npl.disableCache()
+        self.assertIsNone(self.npl.cacheInfo())
+        self.assertNotEqual(self.npl.getCL.__name__, 'cachedLookup')
+
+
+class C81CompactTest(unittest.TestCase):
+
+    def setUp(self):
+        with open(testdir + 'sample2.C81') as f:
+            self.vr8 = c81utils.load(f)
+        rng = np.random.default_rng(13)
+        self.alphas = rng.uniform(-200, 200, 1000)
+        self.machs = rng.uniform(-0.1, 1.1, 1000)
+
+    def test_compact(self):
+        expected = self.vr8.getCoeffsArray(self.alphas, self.machs)
+        nbytes = self.vr8.nbytes()
+        saved = self.vr8.compact()
+        self.assertEqual(nbytes - saved, self.vr8.nbytes())
+        self.assertGreater(saved, 0)
+        self.assertEqual(self.vr8.CL.val.dtype, np.float32)
+
+        # Identical grids are shared between coefficients and airfoils
+        with open(testdir + 'sample2.C81') as f:
+            vr8 = c81utils.load(f, compact=True)
+        self.assertIs(vr8.CL.mach, self.vr8.CL.mach)
+        self.assertIs(vr8.CD.alpha, self.vr8.CD.alpha)
+        self.assertFalse(vr8.CL.mach.flags.writeable)
+        alpha = [0, 2, 8, 10]
+        mach = [0, 0.5, 1]
+        coeff = np.ones((4, 3))
+        airfoil = c81utils.C81('NACA XXXX', alpha, mach, coeff, \
+                               alpha, mach, coeff, alpha, mach, coeff)
+        airfoil.compact()
+        self.assertIs(airfoil.CD.alpha, airfoil.CL.alpha)
+        self.assertIs(airfoil.CM.mach, airfoil.CL.mach)
+
+        # Accuracy compared to float64 tables
+        for val, expectedVal in zip(self.vr8.getCoeffsArray(self.alphas, self.machs), expected):
+            np.testing.assert_allclose(val, expectedVal, rtol=0, atol=1e-6)
+        for indx in range(10):
+            for val, expectedVal in zip(self.vr8.getCoeffs(self.alphas[indx], self.machs[indx]),
+                                        expected):
+                self.assertAlmostEqual(val, expectedVal[indx], places=6)
+
+        # Output is unchanged
+        with open(testdir + 'sample2.C81') as f:
+            self.assertEqual(c81utils.dumps(self.vr8), f.read())
+        with open(testdir + 'sample1.C81') as f:
+            text = f.read()
+        npl = c81utils.load(io.StringIO(text), compact=True)
+        # Widened float32 values such as -0.963 would round differently
+        self.assertEqual(c81utils.dumps(npl), c81utils.dumps(c81utils.load(io.StringIO(text))))
+
+    def test_slots(self):
+        self.assertRaises(AttributeError, setattr, self.vr8.CL, 'extra', 1)
+
+
+class C81FingerprintTest(unittest.TestCase):
+
+    def setUp(self):
+        with open(testdir + 'sample2.C81') as f:
+            self.text = f.read()
+        self.vr8 = c81utils.load(io.StringIO(self.text))
+
+    def test_fingerprint(self):
+        other = c81utils.load(io.StringIO(self.text.replace('VR8TM6', 'VR8TM7', 1)))
+        self.assertEqual(other.fingerprint(), self.vr8.fingerprint())
+        self.assertTrue(other == self.vr8)
+        self.assertFalse(self.vr8 == 'VR8TM6')
+
+        # All tables are compared and changes invalidate the fingerprint
+        fingerprint = other.CD.fingerprint()
+        other.CD.val[3, 2] += 1e-12
+        self.assertEqual(other.CD.fingerprint(), fingerprint)
+        other.CD.markDirty()
+        self.assertNotEqual(other.CD.fingerprint(), fingerprint)
+        self.assertNotEqual(other.fingerprint(), self.vr8.fingerprint())
+        self.assertTrue(other != self.vr8)
+        other.CD.val = self.vr8.CD.val
+        self.assertTrue(other == self.vr8)
+
+    def test_signedZeroNaN(self):
+        with open('samples/NACA63A012_XFOIL_polars.dat.C81') as f:
+            text = f.read()
+        self.assertIn('-0.000', text)
+        other = c81utils.load(io.StringIO(text.replace('-0.000', ' 0.000')))
+        airfoil = c81utils.load(io.StringIO(text))
+        self.assertEqual(other.fingerprint(), airfoil.fingerprint())
+        self.assertTrue(other == airfoil)
+
+        # Tables with NaN share fingerprints but do not compare equal
+        other.CM.val = np.where(other.CM.val == other.CM.val[1, 1], np.nan, other.CM.val)
+        airfoil.CM.val = other.CM.val.copy()
+        self.assertEqual(other.fingerprint(), airfoil.fingerprint())
+        self.assertFalse(other == airfoil)
+
+    def test_registry(self):
+        registry = c81utils.TableRegistry()
+        vr8 = c81utils.load(io.StringIO(self.text), registry=registry)
+        renamed = c81utils.load(io.StringIO(self.text.replace('VR8TM6', 'VR8TM7', 1)),
+                                registry=registry)
+        self.assertEqual(registry.info(), {'hits': 3, 'misses': 3, 'size': 3})
+        for coeffname in ('CL', 'CD', 'CM'):
+            self.assertIs(getattr(renamed, coeffname), getattr(vr8, coeffname))
+        self.assertNotEqual(renamed.airfoilname, vr8.airfoilname)
+        vr8.getCL(2.0, 0.3)
+        self.assertTrue(renamed.CL.isBuilt)
+
+        # Tables with different contents are kept apart
+        self.vr8.CM.val = self.vr8.CM.val * 2.0
+        registry.register(self.vr8)
+        self.assertIs(self.vr8.CL, vr8.CL)
+        self.assertIsNot(self.vr8.CM, vr8.CM)
+        self.assertEqual(len(registry), 4)
+
+
+class C81IndexTest(unittest.TestCase):
+
+    def setUp(self):
+        with open(testdir + 'sample1.C81') as f:
+            self.npl = c81utils.load(f)
+        rng = np.random.default_rng(4)
+        table = self.npl.CL
+        # Random points along with all grid points and cell midpoints
+        self.alphas = np.concatenate([rng.uniform(-200, 200, 2000), table.alpha,
+                                      0.5*(table.alpha[1:] + table.alpha[:-1])])
+        self.machs = np.resize(np.concatenate([rng.uniform(-0.1, 1.0, 200), table.mach,
+                                               0.5*(table.mach[1:] + table.mach[:-1])]),
+                               self.alphas.size)
+
+    def test_indexMatchesBisection(self):
+        expected = self.npl.getCoeffsArray(self.alphas, self.machs)
+        expectedScalar = list(map(self.npl.getCoeffs, self.alphas, self.machs))
+        nbytes = self.npl.buildIndex()
+        self.assertGreater(nbytes, 0)
+        self.assertIsNotNone(self.npl.CL._alphaIndex)
+        for val, expectedVal in zip(self.npl.getCoeffsArray(self.alphas, self.machs), expected):
+            np.testing.assert_array_equal(val, expectedVal)
+        self.assertListEqual(list(map(self.npl.getCoeffs, self.alphas, self.machs)),
+                             expectedScalar)
+
+        # Index survives a refresh
+        self.npl.refreshInterpolation()
+        self.assertIsNotNone(self.npl.CL._alphaIndex)
+        self.assertTrue(np.isnan(self.npl.getCL(float('nan'), 0.3)))
+        self.assertTrue(np.isnan(self.npl.getCoeffs(2.0, float('nan'))).all())
+        self.assertTrue(np.isnan(self.npl.CL.interpolate([np.nan], [0.3])).all())
+        self.npl.dropIndex()
+        self.assertIsNone(self.npl.CL._alphaIndex)
+        self.npl.refreshInterpolation()
+        self.assertIsNone(self.npl.CL._alphaIndex)
+
+    def test_irregularFallback(self):
+        self.npl.buildIndex(maxBuckets=20)
+        self.assertIsNone(self.npl.CL._alphaIndex)
+        index = self.npl.CL._machIndex
+        self.assertEqual(self.npl.CL.indexNbytes(), index.nbytes)
+        self.assertGreater(index.nbytes, index.start.nbytes + index.width.nbytes)
+        alpha = self.npl.CL.alpha[10]
+        self.assertEqual(self.npl.getCL(alpha, 0.3), self.npl.getCLArray(alpha, 0.3))
+
+
+class AirfoilDatabaseTest(unittest.TestCase):
+
+    def setUp(self):
+        alpha = [0, 2, 8, 10]
+        mach = [0, 0.5, 1]
+        coeff = np.array([[0.0, 0.1, 0.2], \
+                          [0.2, 0.3, 0.4], \
+                          [0.8, 0.9, 1.0], \
+                          [1.0, 1.1, 1.2]])
+        self.root = c81utils.C81('Root', alpha, mach, coeff, \
+                                 alpha, mach, coeff, alpha, mach, coeff)
+        self.tip = c81utils.C81('Tip', alpha, mach, 2*coeff, \
+                                alpha, mach, 3*coeff, alpha, mach, 4*coeff)
+        self.mid = c81utils.C81('Mid', alpha, mach, coeff + 1, \
+                                alpha, mach, coeff, alpha, mach, coeff)
+        self.blade = c81utils.AirfoilDatabase([0.2, 0.6, 1.0], [self.root, self.mid, self.tip])
+
+    def test_blend(self):
+        stations = np.array([0.0, 0.2, 0.4, 0.6, 0.8, 1.0, 1.2])
+        CL, CD, CM = self.blade.getCoeffsArray(stations, 2, 0.5)
+        np.testing.assert_allclose(CL, [0.3, 0.3, 0.8, 1.3, 0.95, 0.6, 0.6], atol=1e-12)
+        np.testing.assert_allclose(CD, [0.3, 0.3, 0.3, 0.3, 0.6, 0.9, 0.9], atol=1e-12)
+        np.testing.assert_allclose(CM, [0.3, 0.3, 0.3, 0.3, 0.75, 1.2, 1.2], atol=1e-12)
+        np.testing.assert_array_equal(CL, self.blade.getCLArray(stations, 2, 0.5))
+        np.testing.assert_array_equal(CD, self.blade.getCDArray(stations, 2, 0.5))
+        np.testing.assert_array_equal(CM, self.blade.getCMArray(stations, 2, 0.5))
+
+    def test_broadcast(self):
+        stations = np.linspace(0.2, 1.0, 5)[:, np.newaxis]
+        alphas = np.array([1.0, 5.0, 9.0])
+        CL = self.blade.getCLArray(stations, alphas, 0.25)
+        self.assertEqual(CL.shape, (5, 3))
+        np.testing.assert_allclose(CL[0], self.root.getCLArray(alphas, 0.25), atol=1e-12)
+        np.testing.assert_allclose(CL[-1], self.tip.getCLArray(alphas, 0.25), atol=1e-12)
+
+        self.assertEqual(self.blade.getCLArray([], [], []).shape, (0,))
+        for val in self.blade.getCoeffsArray(np.empty((0, 4)), 2.0, 0.3):
+            self.assertEqual(val.shape, (0, 4))
+
+    def test_bad(self):
+        self.assertRaises(ValueError, c81utils.AirfoilDatabase, [0.6, 0.2], [self.root, self.tip])
+        self.assertRaises(ValueError, c81utils.AirfoilDatabase, [0.2], [self.root, self.tip])
+
+
+class C81GradientTest(unittest.TestCase):
+
+    def setUp(self):
+        with open(testdir + 'sample1.C81') as f:
+            self.npl = c81utils.load(f)
+
+    def test_finiteDifference(self):
+        rng = np.random.default_rng(15)
+        alphas = rng.uniform(-170, 170, 200)
+        machs = rng.uniform(0.05, 0.75, 200)
+        step = 1e-7
+        for coeffname, (val, dAlpha, dMach) in zip(('CL', 'CD', 'CM'),
+                                                   self.npl.getCoeffsGradient(alphas, machs)):
+            getArray = getattr(self.npl, 'get' + coeffname + 'Array')
+            np.testing.assert_array_equal(val, getArray(alphas, machs))
+            np.testing.assert_allclose(dAlpha, (getArray(alphas + step, machs) - val) / step,
+                                       rtol=1e-5, atol=1e-6)
+            np.testing.assert_allclose(dMach, (getArray(alphas, machs + step) - val) / step,
+                                       rtol=1e-5, atol=1e-6)
+            gradient = getattr(self.npl, 'get' + coeffname + 'Gradient')(alphas, machs)
+            np.testing.assert_array_equal(gradient[1], dAlpha)
+
+
+class C81InverseTest(unittest.TestCase):
+
+    def setUp(self):
+        with open(testdir + 'sample1.C81') as f:
+            self.npl = c81utils.load(f)
+
+    def test_preStall(self):
+        CLs = np.array([[0.0, 0.5, 1.0], [-0.5, 1.0, 5.0]])
+        alphas = self.npl.getAlphaForCL(CLs, [[0.3], [0.6]])
+        self.assertEqual(alphas.shape, (2, 3))
+        self.assertTrue(np.isnan(alphas[1, 2]))
+        self.assertTrue(np.all((alphas[~np.isnan(alphas)] > -16) &
+                               (alphas[~np.isnan(alphas)] < 16)))
+        np.testing.assert_allclose(self.npl.getCLArray(alphas[:, :2], [[0.3], [0.6]]),
+                                   CLs[:, :2], atol=1e-12)
+
+    def test_allSolutions(self):
+        machs = np.array([0.3, 0.5])
+        pointIndex, alphas = self.npl.getAlphaForCL(0.5, machs, preStall=False, allSolutions=True)
+        self.assertGreater(len(alphas), 2)
+        np.testing.assert_allclose(self.npl.getCLArray(alphas, machs[pointIndex]), 0.5, atol=1e-12)
+        for i in range(2):
+            self.assertEqual(len(np.unique(alphas[pointIndex == i])), np.count_nonzero(pointIndex == i))
+
+        # Solutions on grid points are found once
+        CL = self.npl.CL.val[30, 0]
+        pointIndex, alphas = self.npl.getAlphaForCL(CL, 0.0, allSolutions=True)
+        self.assertListEqual(alphas.tolist(), [self.npl.CL.alpha[30]])
+
+    def test_blocks(self):
+        rng = np.random.default_rng(16)
+        CLs = rng.uniform(-1.5, 1.5, (40, 5))
+        machs = rng.uniform(0.0, 0.8, (40, 5))
+        expected = self.npl.getAlphaForCL(CLs, machs)
+        expectedAll = self.npl.getAlphaForCL(CLs, machs, preStall=False, allSolutions=True)
+        blockSize = c81utils.SOLVE_BLOCK_SIZE
+        # Blocks of a few points each
+        c81utils.SOLVE_BLOCK_SIZE = 3 * self.npl.CL.alpha.size
+        try:
+            np.testing.assert_array_equal(self.npl.getAlphaForCL(CLs, machs), expected)
+            for val, expectedVal in zip(self.npl.getAlphaForCL(CLs, machs, preStall=False,
+                                                               allSolutions=True), expectedAll):
+                np.testing.assert_array_equal(val, expectedVal)
+        finally:
+            c81utils.SOLVE_BLOCK_SIZE = blockSize
+        self.assertEqual(self.npl.getAlphaForCL(np.empty((0, 2)), 0.3).shape, (0, 2))
+
+    def test_alphaRange(self):
+        alphas = self.npl.getAlphaForCL(0.5, 0.3, alphaRange=(20, 180))
+        self.assertTrue(20 <= alphas <= 180)
+        self.assertAlmostEqual(self.npl.getCL(alphas, 0.3), 0.5, places=12)
+        self.assertTrue(np.isnan(self.npl.getAlphaForCL(0.5, 0.3, alphaRange=(100, 180))))
+
+
+class C81CursorTest(unittest.TestCase):
+
+    def setUp(self):
+        with open(testdir + 'sample1.C81') as f:
+            self.npl = c81utils.load(f)
+        rng = np.random.default_rng(21)
+        self.alphas = rng.uniform(-30, 30, 500)
+        self.machs = rng.uniform(0.0, 0.9, 500)
+
+    def assertMatches(self, cursor, alphas, machs):
+        c81utils.setBackend('numpy')
+        for val, expected in zip(cursor.getCoeffs(alphas, machs),
+                                 self.npl.getCoeffsArray(alphas, machs)):
+            np.testing.assert_array_equal(val, expected)
+
+    def test_coherent(self):
+        backend = c81utils.backend()
+        cursor = self.npl.cursor(500)
+        try:
+            for step in range(20):
+                self.assertMatches(cursor, self.alphas + 0.5 * step, self.machs + 0.002 * step)
+                if step == 0:
+                    misses = cursor.info()['misses']
+            # Points moving by less than a cell are not searched again
+            self.assertEqual(cursor.info()['misses'], misses)
+
+            self.npl.buildIndex()
+            self.assertMatches(cursor, self.alphas[::-1] * 10.0, self.machs * 1.5 - 0.2)
+        finally:
+            c81utils.setBackend(backend)
+        np.testing.assert_array_equal(cursor.getCL(self.alphas, 0.3),
+                                      self.npl.getCLArray(self.alphas, 0.3))
+
+    def test_resize(self):
+        cursor = self.npl.cursor(500)
+        cursor.getCoeffs(self.alphas, self.machs)
+        cursor.resize(600)
+        self.assertRaises(ValueError, cursor.getCoeffs, self.alphas, self.machs)
+        CL, CD, CM = cursor.getCoeffs(np.resize(self.alphas, 600), 0.4)
+        np.testing.assert_array_equal(CM, self.npl.getCMArray(np.resize(self.alphas, 600), 0.4))
+        cursor.resize(10)
+        np.testing.assert_array_equal(cursor.getCD(self.alphas[:10], self.machs[:10]),
+                                      self.npl.getCDArray(self.alphas[:10], self.machs[:10]))
+        cursor.reset()
+        self.assertEqual(cursor.info(), {'npoints': 10, 'hits': 0, 'misses': 0})
+
+
+class C81BackendTest(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = c81utils.backend()
+        with open(testdir + 'sample1.C81') as f:
+            self.npl = c81utils.load(f)
+        rng = np.random.default_rng(17)
+        self.alphas = np.concatenate([rng.uniform(-200, 200, 2000), self.npl.CL.alpha])
+        self.machs = np.resize(np.concatenate([rng.uniform(-0.1, 1.0, 200), self.npl.CL.mach]),
+                               self.alphas.size)
+
+    def test_out(self):
+        out = tuple(np.empty(self.alphas.shape) for i in range(3))
+        result = self.npl.evaluateCoeffs(self.alphas, self.machs, out=out)
+        self.assertIs(result, out)
+        for val, expected in zip(out, self.npl.getCoeffsArray(self.alphas, self.machs)):
+            np.testing.assert_array_equal(val, expected)
+        self.assertRaises(ValueError, self.npl.evaluateCoeffs, self.alphas, self.machs,
+                          out=(np.empty(3),) * 3)
+
+    def test_setBackend(self):
+        self.assertIn(c81utils.backend(), c81utils.BACKENDS)
+        self.assertRaises(ValueError, c81utils.setBackend, 'fortran')
+        c81utils.setBackend('numpy')
+        self.assertEqual(c81utils.backend(), 'numpy')
+
+    @unittest.skipIf(c81utils.numba is None, 'Numba is not installed')
+    def test_identical(self):
+        c81utils.setBackend('numpy')
+        expected = self.npl.getCoeffsArray(self.alphas, self.machs)
+        c81utils.setBackend('numba')
+        for val, expectedVal in zip(self.npl.getCoeffsArray(self.alphas, self.machs), expected):
+            np.testing.assert_array_equal(val, expectedVal)
+
+        # The kernel uses grid indices once built
+        self.npl.buildIndex()
+        for val, expectedVal in zip(self.npl.getCoeffsArray(self.alphas, self.machs), expected):
+            np.testing.assert_array_equal(val, expectedVal)
+
+    def test_scalar(self):
+        for backend in c81utils.BACKENDS:
+            if backend == 'numba' and c81utils.numba is None:
+                continue
+            c81utils.setBackend(backend)
+            vals = self.npl.evaluateCoeffs(2.0, 0.3)
+            self.assertEqual(vals, self.npl.getCoeffs(2.0, 0.3))
+            for val in vals:
+                self.assertIsInstance(val, np.float64)
+
+    @unittest.skipIf(c81utils.numba is None, 'Numba is not installed')
+    def test_parallel(self):
+        # Run in a separate process as Numba's thread pool is not fork-safe
+        script = ('import numpy as np, c81utils\n'
+                  'npl = c81utils.load(open("' + testdir + 'sample1.C81"))\n'
+                  'alphas = np.linspace(-30, 30, 5001)\n'
+                  'machs = np.linspace(-0.1, 1.0, 5001)\n'
+                  'for val, expected in zip(npl.evaluateCoeffs(alphas, machs, parallel=True),\n'
+                  '                         npl.evaluateCoeffs(alphas, machs)):\n'
+                  '    np.testing.assert_array_equal(val, expected)\n')
+        subprocess.run([sys.executable, '-c', script], check=True)
+
+    def tearDown(self):
+        c81utils.setBackend(self.backend)
+
+
 class C81WriteTest(unittest.TestCase):
 
     def setUp(self):
@@ -208,10 +872,388 @@ class C81WriteTest(unittest.TestCase):
                                     'sample2_dummy.C81', \
                                     'C81 file write test failed'))
 
+    def test_dumps(self):
+        with open('tests/sample2.C81', 'r') as fh:
+            self.assertEqual(c81utils.dumps(self.airfoil), fh.read())
+
+        # Values wider than the field width are wrapped as before
+        self.airfoil.CL.val[0, :] = -1234.5
+        lines = c81utils.dumps(self.airfoil).splitlines()
+        self.assertEqual(len(lines[3]), 70)
+        self.assertEqual(lines[4], '       ' + '-1234.500'*5)
+
     def tearDown(self):
         if os.path.exists('sample2_dummy.C81'):
             os.remove('sample2_dummy.C81')
 
 
+class C81BinaryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, 'sample1.C81')
+        shutil.copy(testdir + 'sample1.C81', self.filename)
+        with open(self.filename) as fh:
+            self.npl = c81utils.load(fh)
+
+    def assertTablesEqual(self, first, second):
+        self.assertEqual(first.airfoilname, second.airfoilname)
+        for coeffname in ('CL', 'CD', 'CM'):
+            for field in ('alpha', 'mach', 'val'):
+                np.testing.assert_array_equal(getattr(getattr(first, coeffname), field),
+                                              getattr(getattr(second, coeffname), field))
+
+    def test_roundtrip(self):
+        binname = os.path.join(self.tmpdir, 'sample1.bin')
+        c81utils.save_binary(self.npl, binname)
+        self.assertTablesEqual(c81utils.load_binary(binname), self.npl)
+
+        mapped = c81utils.load_binary(binname, mmap=True)
+        self.assertTablesEqual(mapped, self.npl)
+        self.assertIsInstance(mapped.CL.val.base, np.memmap)
+        self.assertEqual(mapped.getCL(3.3, 0.42), self.npl.getCL(3.3, 0.42))
+
+    def test_sidecar(self):
+        sidecar = self.filename + c81utils.SIDECAR_SUFFIX
+        with open(self.filename) as fh:
+            self.assertTablesEqual(c81utils.load(fh, cache=True), self.npl)
+        self.assertTrue(os.path.exists(sidecar))
+        with open(self.filename) as fh:
+            self.assertTablesEqual(c81utils.load(fh, cache=True), self.npl)
+
+        # Touched but unchanged file still uses the sidecar
+        os.utime(self.filename, ns=(0, 0))
+        self.assertTrue(c81utils._sidecarIsFresh(self.filename, sidecar))
+
+        # Modified file rewrites the sidecar
+        with open(self.filename) as fh:
+            lines = fh.readlines()
+        lines[0] = 'MODIFIED' + lines[0][8:]
+        with open(self.filename, 'w') as fh:
+            fh.writelines(lines)
+        self.assertFalse(c81utils._sidecarIsFresh(self.filename, sidecar))
+        with open(self.filename) as fh:
+            self.assertTrue(c81utils.load(fh, cache=True).airfoilname.startswith('MODIFIED'))
+        with open(self.filename) as fh:
+            self.assertTrue(c81utils.load(fh, cache=True).airfoilname.startswith('MODIFIED'))
+
+    def test_sidecarMultiple(self):
+        multi = os.path.join(self.tmpdir, 'multi.C81')
+        with open(multi, 'w') as fh:
+            for filename in ('sample1.C81', 'sample2.C81'):
+                with open(testdir + filename) as source:
+                    fh.write(source.read())
+        for i in range(2):
+            with open(multi) as fh:
+                names = [c81utils.load(fh, cache=True).airfoilname.strip() for j in range(2)]
+            self.assertListEqual(names, ['NPL_9615 AIRFOIL (7 Aug 1990)',
+                                         'VR8TM6 VR8 -6 tab C81 format'])
+        self.assertFalse(os.path.exists(multi + c81utils.SIDECAR_SUFFIX))
+
+        # Single airfoil files leave the file object after the table
+        with open(self.filename) as fh:
+            c81utils.load(fh, cache=True)
+        with open(self.filename) as fh:
+            c81utils.load(fh, cache=True)
+            self.assertEqual(fh.read(), '')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+
+def sharedLookup(task):
+    """ Looks up CL from shared tables in a worker process """
+    shared, key, alpha, mach = task
+    return os.getpid(), shared[key].getCL(alpha, mach), shared[key].CL.val.flags.writeable
+
+
+def sharedClose(task):
+    """ Looks up CL from shared tables in a worker process and closes them """
+    shared, key, alpha, mach = task
+    with shared:
+        return shared[key].getCL(alpha, mach)
+
+
+class SharedTablesTest(unittest.TestCase):
+
+    def setUp(self):
+        with open(testdir + 'sample1.C81') as fh:
+            self.npl = c81utils.load(fh)
+        with open(testdir + 'sample2.C81') as fh:
+            self.vr8 = c81utils.load(fh)
+        self.shared = c81utils.SharedTables.publish({'npl': self.npl, 'vr8': self.vr8})
+
+    def test_views(self):
+        self.assertListEqual(list(self.shared), ['npl', 'vr8'])
+        view = self.shared['vr8']
+        self.assertIs(self.shared['vr8'], view)
+        self.assertEqual(view.airfoilname, self.vr8.airfoilname)
+        for coeffname in ('CL', 'CD', 'CM'):
+            for field in ('alpha', 'mach', 'val'):
+                arr = getattr(getattr(view, coeffname), field)
+                np.testing.assert_array_equal(arr, getattr(getattr(self.vr8, coeffname), field))
+                self.assertFalse(arr.flags.writeable)
+        self.assertEqual(view.getCM(4.2, 0.51), self.vr8.getCM(4.2, 0.51))
+        self.assertIs(pickle.loads(pickle.dumps(self.shared)), self.shared)
+
+    def test_workers(self):
+        tasks = [(self.shared, 'npl', alpha, 0.3) for alpha in np.linspace(-10, 10, 8)]
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(sharedLookup, tasks))
+        for task, (pid, CL, writeable) in zip(tasks, results):
+            self.assertNotEqual(pid, os.getpid())
+            self.assertEqual(CL, self.npl.getCL(task[2], 0.3))
+            self.assertFalse(writeable)
+
+        # Block outlives the workers that attached to it
+        attached = c81utils._attachSharedMemory(self.shared.name)
+        attached.close()
+
+    def test_unrelatedProcess(self):
+        # A process without a shared resource tracker must not unlink the block on exit
+        code = 'import c81utils; print(c81utils.SharedTables.attach(%r)["npl"].getCL(2.0, 0.3))'
+        output = subprocess.check_output([sys.executable, '-c', code % self.shared.name],
+                                         stderr=subprocess.STDOUT, universal_newlines=True,
+                                         cwd=os.path.dirname(os.path.abspath(c81utils.__file__)))
+        self.assertEqual(float(output), self.npl.getCL(2.0, 0.3))
+        attached = c81utils._attachSharedMemory(self.shared.name)
+        attached.close()
+
+    def test_workersClose(self):
+        # Forked workers inherit the publishing object but must not unlink the block
+        tasks = [(self.shared, 'npl', alpha, 0.3) for alpha in np.linspace(-10, 10, 4)]
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(sharedClose, tasks))
+        self.assertEqual(results, [self.npl.getCL(task[2], 0.3) for task in tasks])
+        attached = c81utils._attachSharedMemory(self.shared.name)
+        attached.close()
+
+    def test_unlink(self):
+        view = self.shared['npl']
+        self.shared.unlink()
+        self.assertRaises(FileNotFoundError, c81utils.SharedTables.attach, self.shared.name)
+        self.assertRaises(ValueError, self.shared.__getitem__, 'vr8')
+
+        # Views handed out earlier keep the block mapped
+        np.testing.assert_array_equal(view.CL.val, self.npl.CL.val)
+        self.assertEqual(view.getCL(2.0, 0.3), self.npl.getCL(2.0, 0.3))
+        self.shared = None
+
+    def tearDown(self):
+        if self.shared is not None:
+            self.shared.unlink()
+
+
+class AirfoilLibraryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        with open(testdir + 'sample1.C81') as fh:
+            self.text1 = fh.read()
+        with open(testdir + 'sample2.C81') as fh:
+            self.text2 = fh.read()
+        shutil.copy(testdir + 'sample1.C81', self.tmpdir)
+        self.multi = os.path.join(self.tmpdir, 'multi.c81')
+        with open(self.multi, 'w') as fh:
+            fh.write(self.text2 + '\n' + self.text2.replace('VR8TM6', 'VR8TM7', 1))
+        self.indexFile = os.path.join(self.tmpdir, 'index.json')
+
+    def test_lazy(self):
+        library = c81utils.AirfoilLibrary(self.tmpdir, maxsize=2)
+        self.assertEqual(sorted(library), ['NPL_9615 AIRFOIL (7 Aug 1990)',
+                                           'VR8TM6 VR8 -6 tab C81 format',
+                                           'VR8TM7 VR8 -6 tab C81 format'])
+        entry = library.entry('VR8TM7 VR8 -6 tab C81 format')
+        self.assertEqual(entry['source'], self.multi)
+        self.assertEqual(entry['offset'], len(self.text2) + 1)
+        self.assertListEqual(entry['sizes'], [12, 68, 14, 39, 13, 41])
+        self.assertEqual(library.cacheInfo()['misses'], 0)
+
+        vr8 = c81utils.load(io.StringIO(self.text2))
+        airfoil = library['VR8TM7 VR8 -6 tab C81 format']
+        self.assertTrue(airfoil.airfoilname.startswith('VR8TM7'))
+        np.testing.assert_array_equal(airfoil.CD.val, vr8.CD.val)
+        self.assertIs(library['VR8TM7 VR8 -6 tab C81 format'], airfoil)
+
+        library['VR8TM6 VR8 -6 tab C81 format']
+        library['NPL_9615 AIRFOIL (7 Aug 1990)']
+        self.assertEqual(library.cacheInfo(), {'hits': 1, 'misses': 3, 'size': 2, 'maxsize': 2})
+
+    def test_index(self):
+        c81utils.AirfoilLibrary(self.tmpdir, indexFile=self.indexFile)
+        self.assertTrue(os.path.exists(self.indexFile))
+
+        # Unchanged files are not scanned again
+        scan = c81utils._scanC81File
+        scanned = []
+        c81utils._scanC81File = lambda filename: scanned.append(filename) or scan(filename)
+        try:
+            library = c81utils.AirfoilLibrary(self.tmpdir, indexFile=self.indexFile)
+            self.assertListEqual(scanned, [])
+            self.assertEqual(len(library), 3)
+
+            with open(self.multi, 'w') as fh:
+                fh.write(self.text2)
+            os.utime(self.multi, ns=(0, 0))
+            library = c81utils.AirfoilLibrary(self.tmpdir, indexFile=self.indexFile)
+            self.assertListEqual(scanned, [self.multi])
+            self.assertEqual(len(library), 2)
+        finally:
+            c81utils._scanC81File = scan
+
+    def test_latin1(self):
+        # Names outside UTF-8 do not stop the scan
+        accented = os.path.join(self.tmpdir, 'accented.c81')
+        with open(accented, 'w', encoding='latin-1') as fh:
+            fh.write(self.text2.replace('VR8TM6', 'VR8TMÉ', 1))
+        library = c81utils.AirfoilLibrary(accented, indexFile=self.indexFile)
+        airfoil = library['VR8TMÉ VR8 -6 tab C81 format']
+        self.assertTrue(airfoil.airfoilname.startswith('VR8TMÉ'))
+        np.testing.assert_array_equal(airfoil.CL.val, c81utils.load(io.StringIO(self.text2)).CL.val)
+        self.assertIn('VR8TMÉ VR8 -6 tab C81 format',
+                      c81utils.AirfoilLibrary(accented, indexFile=self.indexFile))
+
+    def test_bad(self):
+        shutil.copy(self.multi, os.path.join(self.tmpdir, 'copy.C81'))
+        self.assertRaises(ValueError, c81utils.AirfoilLibrary, self.tmpdir)
+
+        truncated = os.path.join(self.tmpdir, 'truncated.dat')
+        with open(truncated, 'w') as fh:
+            fh.write(self.text1[:-200])
+        self.assertRaises(ValueError, c81utils.AirfoilLibrary, truncated)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+
+class XfoilConvertTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.polar = 'samples/NACA63A012_XFOIL_polars.dat'
+        for i in range(3):
+            shutil.copy(self.polar, os.path.join(self.tmpdir, 'polar' + str(i) + '.dat'))
+        with open(os.path.join(self.tmpdir, 'bad.dat'), 'w') as fh:
+            fh.write('Not a polar file\n')
+
+    def test_loadXfoil(self):
+        with open(self.polar) as fh:
+            airfoil = c81utils.loadXfoil(fh, mach=[0.1, 0.3])
+        self.assertEqual(airfoil.airfoilname, 'NACA 63012A')
+        self.assertListEqual(airfoil.CL.mach.tolist(), [0.1, 0.3])
+        self.assertListEqual(airfoil.CL.val[1].tolist(), [0.1154, 0.1154])
+        self.assertListEqual(airfoil.CD.val[1].tolist(), [0.00426, 0.00426])
+        self.assertListEqual(airfoil.CM.val[1].tolist(), [-0.0004, -0.0004])
+
+    def test_convert(self):
+        # Files matched twice are converted once
+        reports = c81utils.convertXfoil([self.tmpdir, os.path.join(self.tmpdir, '*.dat')],
+                                        processes=2)
+        self.assertEqual(len(reports), 4)
+        self.assertTrue(all(os.path.isabs(report['source']) for report in reports))
+        failed = [report for report in reports if report['error'] is not None]
+        self.assertEqual(len(failed), 1)
+        self.assertTrue(failed[0]['source'].endswith('bad.dat'))
+        for report in reports:
+            if report['error'] is None:
+                self.assertTrue(filecmp.cmp(report['output'], self.polar + '.C81', shallow=False))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+
+class ValidateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        with open(testdir + 'sample1.C81') as fh:
+            self.lines = fh.readlines()
+
+    def validate(self, lines, **kwargs):
+        return [(issue['line'], issue['section'], issue['level'])
+                for issue in c81utils.validateFile(io.StringIO(''.join(lines)), **kwargs)]
+
+    def test_valid(self):
+        with open(testdir + 'sample2.C81') as fh:
+            text2 = fh.read()
+        self.assertListEqual(self.validate(self.lines + [text2]), [])
+
+    def test_layout(self):
+        self.assertListEqual(self.validate(self.lines[:-3]), [(361, 'CM', 'error')])
+        self.assertListEqual(self.validate(self.lines[:5] + self.lines[7:]),
+                             [(124, 'CL', 'error')])
+        self.assertListEqual(self.validate(['NACA0012\n']), [(1, None, 'error')])
+
+        lines = list(self.lines)
+        lines[4] = lines[4].rstrip() + '   1.0\n'
+        self.assertListEqual(self.validate(lines), [(5, 'CL', 'error')])
+
+    def test_empty(self):
+        for lines in ([], ['\n', '   \n']):
+            issues = c81utils.validateFile(io.StringIO(''.join(lines)))
+            self.assertListEqual([(issue['line'], issue['message']) for issue in issues],
+                                 [(1, 'No airfoil header found')])
+
+    def test_negativeCounts(self):
+        with open(testdir + 'sample2.C81') as fh:
+            lines2 = fh.readlines()
+        lines = list(self.lines)
+        lines[0] = lines[0][:32] + '-1' + lines[0][34:]
+        self.assertListEqual(self.validate(lines + lines2), [(1, 'CL', 'error')])
+
+    def test_machLine(self):
+        lines = list(self.lines)
+        lines[1] = lines[1].rsplit(None, 1)[0] + '\n'
+        issues = c81utils.validateFile(io.StringIO(''.join(lines)))
+        self.assertListEqual([(issue['line'], issue['message']) for issue in issues],
+                             [(2, 'Expected 9 values, found 8')])
+        lines[1] = lines[1].rstrip() + 'x\n'
+        self.assertListEqual(self.validate(lines), [(2, 'CL', 'error'), (2, 'CL', 'error')])
+
+    def test_resync(self):
+        with open(testdir + 'sample2.C81') as fh:
+            lines2 = fh.readlines()
+        fields = lines2[3].split()
+        fields[2] = 'nan'
+        lines2[3] = ' '.join(fields) + '\n'
+        nlines = len(self.lines)
+
+        # Issues in later airfoils are found after a broken layout
+        self.assertListEqual(self.validate(self.lines[:5] + self.lines[7:] + lines2),
+                             [(124, 'CL', 'error'), (nlines + 2, 'CL', 'error')])
+
+        # A header read as an alpha row is checked as the next airfoil
+        issues = self.validate(self.lines[:-3] + lines2)
+        self.assertListEqual(issues, [(nlines - 2, 'CM', 'error'), (nlines + 1, 'CL', 'error')])
+
+    def test_values(self):
+        lines = list(self.lines)
+        lines[9], lines[11] = lines[11], lines[9]
+        for lineno, value in ((5, 'nan'), (13, '9.0')):
+            fields = lines[lineno].split()
+            fields[2] = value
+            lines[lineno] = ' '.join(fields) + '\n'
+        self.assertListEqual(self.validate(lines), [(6, 'CL', 'error'),
+                                                    (12, 'CL', 'error'),
+                                                    (14, 'CL', 'warning')])
+        self.assertListEqual(self.validate(lines, limits={'CL': (-10.0, 10.0)}),
+                             [(6, 'CL', 'error'), (12, 'CL', 'error')])
+
+    def test_validate(self):
+        shutil.copy(testdir + 'sample1.C81', self.tmpdir)
+        shutil.copy(testdir + 'sample2.C81', self.tmpdir)
+        with open(os.path.join(self.tmpdir, 'truncated.C81'), 'w') as fh:
+            fh.writelines(self.lines[:-3])
+        report = c81utils.validate(self.tmpdir, processes=2)
+        self.assertEqual((report['nfiles'], report['nerrors'], report['nwarnings']), (3, 1, 0))
+        self.assertListEqual([os.path.basename(fileReport['source'])
+                              for fileReport in report['files'] if not fileReport['valid']],
+                             ['truncated.C81'])
+        self.assertEqual(json.loads(json.dumps(report)), report)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+
 if __name__ == '__main__':
     unittest.main()